@@ -43,11 +43,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'scheduler.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'scheduler.middleware.PrimaryAfterWriteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,12 +77,97 @@ WSGI_APPLICATION = 'Dincharya.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Production SQLite profile (scheduler/database.py), enabled with
+# DINCHARYA_SQLITE_PRODUCTION=1. It switches the database file to WAL, which
+# rewrites the file header and leaves -wal/-shm files beside it, so it stays
+# off for the db.sqlite3 checked into the repository.
+SQLITE_PRODUCTION_PROFILE = os.environ.get('DINCHARYA_SQLITE_PRODUCTION') == '1'
+SQLITE_PRODUCTION_OPTIONS = {
+    # Take the write lock at BEGIN so transactions queue up instead of
+    # failing with "database is locked" when a read is upgraded. Every
+    # atomic() block takes it, read-only ones included, so keep those out of
+    # hot read paths.
+    'transaction_mode': 'IMMEDIATE',
+    # Seconds a writer waits for the lock (sqlite's busy_timeout). With
+    # SQLITE_LOCK_RETRIES below a request gives up after about 15 seconds.
+    'timeout': 5,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections between requests, checking them before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': dict(SQLITE_PRODUCTION_OPTIONS) if SQLITE_PRODUCTION_PROFILE else {},
+    }
+}
+
+# Optional read replica for reporting queries (scheduler/replicas.py). Point
+# DINCHARYA_REPLICA_DB at a copy of the database kept fresh by the
+# sync_replica command; without it every query runs on the primary.
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA_DATABASE_PATH = os.environ.get('DINCHARYA_REPLICA_DB')
+if REPLICA_DATABASE_PATH:
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # Opened read-only, so a missing file fails instead of being created
+        'NAME': f'file:{REPLICA_DATABASE_PATH}?mode=ro',
+        # Reconnect per request so a refreshed copy is picked up
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'uri': True, 'timeout': 5},
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['scheduler.replicas.ReplicaRouter']
+# Seconds a user's reports stay on the primary after they write
+REPLICA_PIN_SECONDS = 10
+# Seconds an unreachable replica is skipped before it is tried again
+REPLICA_RETRY_SECONDS = 30
+
+# Serve the dashboard, time series and ticket list from scheduler.async_views,
+# which run their independent queries concurrently; enable under ASGI only
+ASYNC_VIEWS = os.environ.get('DINCHARYA_ASYNC_VIEWS') == '1'
+# Give each of those queries its own worker thread and connection
+ASYNC_PARALLEL_QUERIES = True
+
+# Live updates over Server-Sent Events (scheduler/events.py, ASGI only)
+SSE_MAX_CONNECTIONS = 500  # open streams per worker process
+SSE_HEARTBEAT_SECONDS = 15
+SSE_QUEUE_SIZE = 100  # undelivered events per stream before it is told to resync
+
+# Applied to every new SQLite connection by scheduler.database under the
+# production profile (SQLITE_PRODUCTION_PROFILE above)
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative values are KiB: 64 MiB of page cache per connection
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
 }
+SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS if SQLITE_PRODUCTION_PROFILE else {}
+# write_transaction() retries a BEGIN that outlasted the timeout this many
+# times, so a request waits at most about timeout * SQLITE_LOCK_RETRIES
+SQLITE_LOCK_RETRIES = 3
+SQLITE_LOCK_RETRY_DELAY = 0.05
+
+
+# Per-process LRU cache; dashboards and reports are cached under versioned keys
+# (see scheduler/caching.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Upper bound on how stale a cached dashboard can be (overdue counts move with the clock)
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# TaskHistory entries older than this are moved to the archive by archive_task_history
+TASK_HISTORY_RETENTION_DAYS = 180
 
 
 # Password validation
@@ -128,3 +215,19 @@ AUTH_USER_MODEL = 'scheduler.CustomUser'
 LOGIN_URL = 'login'  # use the name you gave in urls.py
 LOGIN_REDIRECT_URL = 'dashboard'  # optional: redirect after login
 LOGOUT_REDIRECT_URL = 'login'  # optional: redirect after logout
+
+# Per-view SQL query budgets, keyed by URL name and checked by
+# scheduler.middleware.RequestMetricsMiddleware. Exceeding one logs a
+# warning, or raises when QUERY_BUDGET_RAISE is set; the test runner below
+# sets it for the whole suite.
+QUERY_BUDGETS = {
+    'dashboard': 10,
+    'tasks:task_list': 6,
+    'tasks:task_api': 4,
+    'tasks_time_series': 4,
+    'export_team_summary': 4,
+    'support_list': 6,
+    'tasks:update_task_status': 10,
+}
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'scheduler.test_runner.QueryBudgetTestRunner'
@@ -30,11 +30,39 @@ class CustomUserAdmin(BaseUserAdmin):
 admin.site.register(CustomUser, CustomUserAdmin)
 
 from .models import SupportTicket
+from tasks.pagination import CappedCountPaginator
+from tasks.search import search_filter
 
 
 @admin.register(SupportTicket)
 class SupportTicketAdmin(admin.ModelAdmin):
-    list_display = ('id', 'subject', 'created_by', 'assigned_to', 'priority', 'status', 'created_at')
+    list_display = ('id', 'subject', 'created_by', 'assigned_to', 'priority_level', 'status', 'created_at')
     list_filter = ('status', 'priority', 'created_at')
     search_fields = ('subject', 'description', 'created_by__username')
-    ordering = ('-created_at',)
+    autocomplete_fields = ('created_by', 'assigned_to')
+    list_select_related = ('created_by', 'assigned_to')
+    # Served by ticket_created_idx, which also serves the drill-down
+    ordering = ('-created_at', '-id')
+    date_hierarchy = 'created_at'
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description='Priority', ordering='priority_rank')
+    def priority_level(self, obj):
+        return obj.get_priority_display()
+
+    def get_search_results(self, request, queryset, search_term):
+        # search_fields above only label the search box; matching uses the full-text index
+        if not search_term.strip():
+            return queryset, False
+        return search_filter(queryset, search_term), False
+
+
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
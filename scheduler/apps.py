@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SchedulerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scheduler'
+
+    def ready(self):
+        # Connects the dashboard cache invalidation and live update receivers,
+        # the SQLite pragma hook and the per-request query recorder
+        from . import caching, database, events, middleware  # noqa: F401
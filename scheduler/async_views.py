@@ -0,0 +1,142 @@
+"""Async versions of the dashboard, weekly time series and support ticket list.
+
+Each view runs the independent queries of its sync counterpart (the
+``*_queries`` helpers in ``views``) at the same time, so a page costs about
+as long as its slowest query rather than the sum of them. They are served
+at the usual URLs when ``settings.ASYNC_VIEWS`` is set, which only pays off
+under ASGI.
+
+Django's async ORM methods (``acount``, ``aaggregate``, ``async for``) hand
+every query to one shared thread, so gathering them still runs the queries
+one after another. ``concurrently`` instead gives each query its own worker
+thread and database connection; SQLite in WAL mode serves readers in
+parallel and releases the GIL while a query runs. Queries made in worker
+threads still count towards the request's ``QUERY_BUDGETS`` entry.
+
+``RequestMetricsMiddleware`` and ``PrimaryAfterWriteMiddleware`` are async
+capable and Django's own middleware is too, so under ASGI these views run
+on the event loop without a sync thread around the whole request.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from tasks.models import WeeklyTaskRollup
+from . import events
+from .caching import TEAM, acached, user_scope
+from .decorators import supervisor_required
+from .replicas import reporting
+from .views import (
+    dashboard_team_queries, dashboard_user_queries, supervisor_dashboard_context,
+    ticket_list_context, ticket_list_queries,
+)
+
+
+def _in_worker(func):
+    @wraps(func)
+    def run():
+        # Worker threads outlive requests: drop connections that have expired
+        # or broken, as request_started does for request threads
+        close_old_connections()
+        return func()
+    return run
+
+
+async def concurrently(queries):
+    """Run the sync callables in the dict ``queries`` at the same time; returns their results by key.
+
+    With ``settings.ASYNC_PARALLEL_QUERIES`` off they run one at a time on
+    the shared thread instead, as the test suite needs: its in-memory
+    database is not visible to other connections inside a test transaction.
+    """
+    if not getattr(settings, 'ASYNC_PARALLEL_QUERIES', True):
+        return {name: await sync_to_async(query)() for name, query in queries.items()}
+    results = await asyncio.gather(
+        *(sync_to_async(_in_worker(query), thread_sensitive=False)() for query in queries.values())
+    )
+    return dict(zip(queries, results))
+
+
+@login_required
+async def dashboard(request):
+    user = await request.auser()
+    is_supervisor = user.role == 'supervisor'
+
+    async def compute_mine():
+        return await concurrently(dashboard_user_queries(user, include_team=is_supervisor))
+
+    async def compute_team():
+        return await concurrently({name: reporting()(query) for name, query in dashboard_team_queries().items()})
+
+    scopes = [user_scope(user.pk)] + ([TEAM] if is_supervisor else [])
+    # The two cached sections are computed at the same time too
+    sections = [acached(f'dashboard:user:{user.pk}', scopes, compute_mine)]
+    if is_supervisor:
+        sections.append(acached('dashboard:team', [TEAM], compute_team, reporting=True))
+    mine, *team = await asyncio.gather(*sections)
+    stats = mine['stats']
+
+    context = {
+        'user': user,
+        'recent_tasks': mine['recent_tasks'],
+        'now': timezone.now(),
+        'tasks_assigned_count': stats['user']['total'],
+        'tasks_completed_count': stats['user']['completed'],
+        'tasks_inprogress_count': stats['user']['in_progress'],
+    }
+    if is_supervisor:
+        supervisor_dashboard_context(context, stats, team[0])
+        template = 'supervisor_dashboard.html'
+    elif user.role == 'intern':
+        context['my_tickets'] = mine['my_tickets']
+        template = 'intern_dashboard.html'
+    else:
+        template = 'unauthorized.html'
+    # Templates and context processors may still touch the database
+    return await sync_to_async(render)(request, template, context)
+
+
+@login_required
+@supervisor_required
+async def tasks_time_series(request):
+    """Async ``views.tasks_time_series``."""
+    results = await concurrently({'series': reporting()(lambda: WeeklyTaskRollup.series(weeks=12))})
+    return JsonResponse(results['series'], safe=False)
+
+
+@login_required
+@supervisor_required
+async def support_ticket_list(request):
+    """Async ``views.support_ticket_list``: the page and the supervisor filter list are read at the same time."""
+    results = await concurrently(ticket_list_queries(request.GET, request.GET.get('cursor')))
+    return await sync_to_async(render)(request, 'support/ticket_list.html', ticket_list_context(request.GET, results))
+
+
+@login_required
+async def event_stream(request):
+    """Server-Sent Events with live task, ticket and reply deltas for the current user.
+
+    Needs ASGI: under WSGI each open stream would tie up a worker thread, so
+    the browser is told to stop (204 ends EventSource reconnects).
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    subscription = events.broker.subscribe(user.pk, supervisor=user.role == 'supervisor')
+    if subscription is None:
+        # Worker is full: close at once and have the browser retry later
+        retry = getattr(settings, 'SSE_FULL_RETRY_MILLISECONDS', 60000)
+        return HttpResponse(f'retry: {retry}\n\n', content_type='text/event-stream')
+    response = StreamingHttpResponse(events.stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,162 @@
+"""Versioned cache for dashboard data.
+
+Each cached value is keyed by the current version of every scope it reads:
+``team`` for numbers aggregated across interns, tickets and groups, and
+``user:<id>`` for one user's own tasks and tickets. The receivers below bump
+versions when the underlying rows change instead of deleting keys, so an
+invalidation is a single ``incr`` and superseded entries simply age out of
+the cache (locmem evicts least recently used entries once ``MAX_ENTRIES`` is
+reached).
+
+Versions are bumped immediately and again once the transaction commits, so
+a request that cached pre-commit data in between is invalidated too.
+
+With the default locmem backend every worker process has its own cache and
+its own versions; a change made in one worker reaches the others only when
+their entries expire after ``DASHBOARD_CACHE_TIMEOUT``. Point ``CACHES`` at
+a shared backend to invalidate across workers.
+
+Fragments read from the replica may lag the version they are cached under,
+so users pinned to the primary after a write bypass them (``reporting=True``).
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.models import Task, TaskHistory
+from .models import CustomUser, SupportReply, SupportTicket
+from .replicas import pinned_to_primary
+
+TEAM = 'team'
+_MISSING = object()
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _version_key(scope):
+    return f'cache-version:{scope}'
+
+
+def _seed():
+    # Seeded from the clock so a version recreated after eviction never
+    # matches entries cached under the evicted one
+    return time.time_ns()
+
+
+def versions(scopes):
+    """Current version of each scope, creating missing ones."""
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    result = {}
+    for scope, key in keys.items():
+        if key not in found:
+            cache.add(key, _seed(), timeout=None)
+            found[key] = cache.get(key)
+        result[scope] = found[key]
+    return result
+
+
+def bump(*scopes):
+    """Invalidate everything cached under ``scopes``."""
+    for scope in set(scopes):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _seed(), timeout=None)
+
+
+def bump_on_change(*scopes):
+    """Bump ``scopes`` now and again when the current transaction commits."""
+    scopes = [scope for scope in scopes if scope is not None]
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def _fragment_key(name, scopes):
+    current = versions(scopes)
+    return f'fragment:{name}:' + ':'.join(f'{scope}={current[scope]}' for scope in sorted(scopes))
+
+
+def cached(name, scopes, compute, timeout=None, reporting=False):
+    """Return ``compute()``, cached under ``name`` and the current versions of ``scopes``.
+
+    Pass ``reporting=True`` when ``compute`` may read from the replica: an
+    entry cached by another user can then be older than the version it is
+    stored under, so requests pinned to the primary skip the cache entirely.
+    """
+    if reporting and pinned_to_primary():
+        return compute()
+    key = _fragment_key(name, scopes)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, timeout or getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60))
+    return value
+
+
+async def acached(name, scopes, compute, timeout=None, reporting=False):
+    """``cached`` for async views: ``compute`` is a coroutine function."""
+    if reporting and pinned_to_primary():
+        return await compute()
+    key = _fragment_key(name, scopes)
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        value = await compute()
+        await cache.aset(key, value, timeout or getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60))
+    return value
+
+
+def _user(user_id):
+    return user_scope(user_id) if user_id else None
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    # The previous assignee's numbers change too when a task is moved
+    previous = getattr(instance, '_loaded_values', {}).get('assigned_to_id')
+    bump_on_change(TEAM, _user(instance.assigned_to_id), _user(previous))
+
+
+# Only saves: a post_delete receiver would stop task deletes from removing
+# history in one DELETE, and the Task receivers already cover those deletes
+@receiver(post_save, sender=TaskHistory)
+def task_history_changed(sender, instance, **kwargs):
+    bump_on_change(TEAM)
+
+
+@receiver(post_save, sender=SupportTicket)
+@receiver(post_delete, sender=SupportTicket)
+def ticket_changed(sender, instance, **kwargs):
+    bump_on_change(TEAM, _user(instance.created_by_id))
+
+
+@receiver(post_save, sender=SupportReply)
+@receiver(post_delete, sender=SupportReply)
+def reply_changed(sender, instance, **kwargs):
+    # Only the ticket's owner is needed, not the ticket
+    owner = SupportTicket.objects.filter(pk=instance.ticket_id).values_list('created_by_id', flat=True).first()
+    bump_on_change(TEAM, _user(owner))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which no dashboard shows
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_on_change(TEAM, _user(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    bump_on_change(TEAM)
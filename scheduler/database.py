@@ -0,0 +1,91 @@
+"""SQLite tuning for concurrent workers.
+
+The production profile is enabled with ``DINCHARYA_SQLITE_PRODUCTION=1``
+(``settings.SQLITE_PRODUCTION_PROFILE``). It leaves the repository's
+``db.sqlite3`` alone otherwise, because switching to WAL rewrites the file.
+
+Under it ``settings.DATABASES`` runs every transaction as ``BEGIN IMMEDIATE``
+(``OPTIONS['transaction_mode']``), so a transaction takes the write lock
+before its first read and can never deadlock upgrading a read lock, the
+source of immediate "database is locked" errors under the default deferred
+mode. Waiting for the lock is bounded by ``OPTIONS['timeout']``.
+
+This module adds the rest of the profile: ``settings.SQLITE_PRAGMAS`` applied
+to every new connection, and ``write_transaction``, an ``atomic()`` whose
+``BEGIN`` is retried with backoff if the lock is still busy when the timeout
+runs out.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+LOCK_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc) for message in LOCK_MESSAGES)
+
+
+def retry_on_lock(func, attempts=None, base_delay=None, max_delay=2.0):
+    """Call ``func()``, retrying while it fails with a lock error.
+
+    Sleeps ``base_delay * 2**n`` seconds (capped at ``max_delay``, with full
+    jitter so waiting writers spread out) between attempts. Only use it
+    around work that is safe to repeat, such as starting a transaction.
+    """
+    attempts = attempts or getattr(settings, 'SQLITE_LOCK_RETRIES', 5)
+    base_delay = base_delay or getattr(settings, 'SQLITE_LOCK_RETRY_DELAY', 0.05)
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except OperationalError as exc:
+            if attempt == attempts or not is_lock_error(exc):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            logger.warning('Database locked (attempt %d of %d); retrying in %.3fs', attempt, attempts, delay)
+            time.sleep(delay)
+
+
+@contextmanager
+def write_transaction(using=DEFAULT_DB_ALIAS):
+    """``transaction.atomic()`` that retries its ``BEGIN`` while the database is locked.
+
+    With ``BEGIN IMMEDIATE`` the write lock is taken when the transaction
+    starts, so that is the only point where lock contention surfaces; a
+    failed ``BEGIN`` leaves nothing to undo, which makes it safe to retry.
+    Nested inside another atomic block this is a plain savepoint.
+    """
+    def enter():
+        block = transaction.atomic(using=using)
+        block.__enter__()
+        return block
+
+    block = retry_on_lock(enter)
+    try:
+        yield
+    except BaseException as exc:
+        if not block.__exit__(type(exc), exc, exc.__traceback__):
+            raise
+    else:
+        block.__exit__(None, None, None)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    read_only = 'mode=ro' in str(connection.settings_dict['NAME'])
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            if read_only and name == 'journal_mode':
+                # Changing the journal mode writes to the file
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
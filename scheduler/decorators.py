@@ -1,6 +1,15 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpResponseForbidden
 
 def supervisor_required(view_func):
+    if iscoroutinefunction(view_func):
+        async def wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if user.role != 'supervisor':
+                return HttpResponseForbidden("Only supervisors can access this page.")
+            return await view_func(request, *args, **kwargs)
+        return markcoroutinefunction(wrapper)
+
     def wrapper(request, *args, **kwargs):
         if request.user.role != 'supervisor':
             return HttpResponseForbidden("Only supervisors can access this page.")
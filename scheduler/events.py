@@ -0,0 +1,197 @@
+"""Live updates over Server-Sent Events.
+
+Saves of tasks, support tickets and replies are published to ``broker`` once
+their transaction commits, as small deltas (a task's new status, the open
+ticket count, ...). ``async_views.event_stream`` forwards each subscriber the
+events meant for it: supervisors hear about everything, other users about
+their own tasks and tickets. Idle streams get a comment line every
+``SSE_HEARTBEAT_SECONDS`` so proxies keep them open, and each worker holds at
+most ``SSE_MAX_CONNECTIONS`` streams.
+
+Like the locmem cache, the broker lives in one worker process: a browser
+only hears about changes saved through the worker it is connected to. Run
+one ASGI worker, or replace ``Broker`` with one backed by a shared pub/sub
+service, to fan out across processes.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.models import Task
+from .models import SupportReply, SupportTicket
+
+_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Event:
+    name: str
+    data: dict
+    # Users other than supervisors who should receive the event
+    audience: frozenset = frozenset()
+    id: int = field(default_factory=lambda: next(_ids))
+
+    def encode(self):
+        return f'id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data, separators=(",", ":"))}\n\n'
+
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: int
+    supervisor: bool
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    # Set when the queue overflowed; the stream then tells the browser to resync
+    dropped: bool = False
+
+    def wants(self, event):
+        return self.supervisor or self.user_id in event.audience
+
+
+class Broker:
+    """In-process pub/sub: ``publish`` may be called from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, user_id, supervisor=False, loop=None):
+        """A new ``Subscription`` on ``loop``, or None once ``SSE_MAX_CONNECTIONS`` are open."""
+        subscription = Subscription(
+            user_id=user_id,
+            supervisor=supervisor,
+            loop=loop or asyncio.get_running_loop(),
+            queue=asyncio.Queue(maxsize=getattr(settings, 'SSE_QUEUE_SIZE', 100)),
+        )
+        with self._lock:
+            if len(self._subscriptions) >= getattr(settings, 'SSE_MAX_CONNECTIONS', 500):
+                return None
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            targets = [subscription for subscription in self._subscriptions if subscription.wants(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(self._deliver, subscription, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(subscription)
+
+    @staticmethod
+    def _deliver(subscription, event):
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            subscription.dropped = True
+
+
+broker = Broker()
+
+
+async def stream(subscription):
+    """Yield ``subscription``'s events as SSE messages, with heartbeats, until the client goes away."""
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    try:
+        yield f'retry: {getattr(settings, "SSE_RETRY_MILLISECONDS", 5000)}\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if subscription.dropped:
+                # Too far behind to catch up one delta at a time
+                yield Event('resync', {}).encode()
+                return
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def publish_on_commit(build):
+    """Publish the ``Event`` returned by ``build()`` once the current transaction commits."""
+    if not len(broker):
+        return
+    transaction.on_commit(lambda: broker.publish(build()))
+
+
+def _audience(*user_ids):
+    return frozenset(user_id for user_id in user_ids if user_id)
+
+
+def open_tickets_count():
+    return SupportTicket.objects.filter(status='open').count()
+
+
+def _task_data(task_id, title, status, assigned_to_id):
+    return {
+        'id': task_id,
+        'title': title,
+        'status': status,
+        'status_display': dict(Task.STATUS_CHOICES).get(status, status),
+        'assigned_to': assigned_to_id,
+    }
+
+
+def task_status_changed(task_id, title, status, assigned_to_id, created_by_id):
+    """Announce a status change written without ``Task.save`` (see ``tasks.transitions``)."""
+    data = _task_data(task_id, title, status, assigned_to_id)
+    publish_on_commit(lambda: Event('task', data, _audience(assigned_to_id, created_by_id)))
+
+
+def tasks_changed(assignee_ids, count):
+    """Announce a bulk change to ``count`` tasks held by ``assignee_ids``."""
+    publish_on_commit(lambda: Event('tasks', {'count': count}, _audience(*assignee_ids)))
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_loaded_values', {}).get('assigned_to_id')
+    data = _task_data(instance.pk, instance.title, instance.status, instance.assigned_to_id)
+    audience = _audience(instance.assigned_to_id, previous, instance.created_by_id)
+    publish_on_commit(lambda: Event('task', data, audience))
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    # The primary key is cleared once the delete finishes, so read it now
+    data = {'id': instance.pk}
+    audience = _audience(instance.assigned_to_id, instance.created_by_id)
+    publish_on_commit(lambda: Event('task_deleted', data, audience))
+
+
+@receiver(post_save, sender=SupportTicket)
+@receiver(post_delete, sender=SupportTicket)
+def ticket_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    data = {'id': instance.pk, 'subject': instance.subject, 'status': instance.status}
+    audience = _audience(instance.created_by_id)
+    publish_on_commit(lambda: Event('ticket', {**data, 'open_tickets': open_tickets_count()}, audience))
+
+
+@receiver(post_save, sender=SupportReply)
+def reply_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created:
+        return
+    ticket = instance.ticket
+    data = {'ticket': ticket.pk, 'subject': ticket.subject}
+    publish_on_commit(lambda: Event('reply', data, _audience(ticket.created_by_id)))
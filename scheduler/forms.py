@@ -29,6 +29,13 @@ class BulkReassignForm(forms.Form):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
+class TaskImportForm(forms.Form):
+    file = forms.FileField(
+        label='CSV or JSON-lines file',
+        help_text='Columns: title, description, assigned_to (username), priority, status, due_date, requires_approval.',
+    )
+
+
 class SignUpForm(UserCreationForm):
     """
     Sign up form for interns only.
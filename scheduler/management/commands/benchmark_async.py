@@ -0,0 +1,124 @@
+import asyncio
+import json
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from django.utils import timezone
+
+from scheduler import async_views, views
+from scheduler.models import CustomUser
+from tasks.models import WeeklyTaskRollup
+from .run_benchmarks import percentile
+
+VIEWS = ('dashboard', 'tasks_time_series', 'support_ticket_list')
+
+
+def build_request(factory, user):
+    request = factory.get('/')
+    request.user = user
+
+    async def auser():
+        return user
+    request.auser = auser
+    return request
+
+
+def summarize(timings, elapsed):
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'requests_per_second': round(len(timings) / elapsed, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync and async dashboard, time series and ticket list views under concurrent '
+        'clients and write JSON results (latency percentiles and throughput). Views are called '
+        'directly, without middleware, and with caching disabled so every request hits the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per client.')
+        parser.add_argument('--label', default='', help='Free-form label stored with the results.')
+        parser.add_argument('--output', help='Write JSON here instead of stdout.')
+        parser.add_argument('--only', nargs='*', choices=VIEWS, help='Run only these views.')
+
+    def handle(self, *args, **options):
+        supervisor = CustomUser.objects.filter(role='supervisor').order_by('id').first()
+        if not supervisor:
+            raise CommandError('Need at least one supervisor; run seed_synthetic_data first.')
+        self.options = options
+
+        results = {}
+        ttl = WeeklyTaskRollup.SERIES_CACHE_TTL
+        WeeklyTaskRollup.SERIES_CACHE_TTL = 0
+        try:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+                for name in options['only'] or VIEWS:
+                    self.stderr.write(f'{name}...')
+                    results[name] = {
+                        'sync': self.run_sync(getattr(views, name), supervisor),
+                        'async': asyncio.run(self.run_async(getattr(async_views, name), supervisor)),
+                    }
+        finally:
+            WeeklyTaskRollup.SERIES_CACHE_TTL = ttl
+
+        report = {
+            'label': options['label'],
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'clients': options['clients'],
+            'requests_per_client': options['requests'],
+            'results': results,
+        }
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stderr.write(f'Wrote {options["output"]}')
+        else:
+            self.stdout.write(payload)
+
+    def run_sync(self, view, user):
+        factory = RequestFactory()
+
+        def client():
+            timings = []
+            try:
+                for _ in range(self.options['requests']):
+                    start = time.perf_counter()
+                    view(build_request(factory, user))
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+            return timings
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.options['clients']) as pool:
+            futures = [pool.submit(client) for _ in range(self.options['clients'])]
+            timings = [ms for future in futures for ms in future.result()]
+        return summarize(timings, time.perf_counter() - start)
+
+    async def run_async(self, view, user):
+        factory = AsyncRequestFactory()
+
+        async def client():
+            timings = []
+            for _ in range(self.options['requests']):
+                start = time.perf_counter()
+                await view(build_request(factory, user))
+                timings.append((time.perf_counter() - start) * 1000)
+            return timings
+
+        start = time.perf_counter()
+        per_client = await asyncio.gather(*(client() for _ in range(self.options['clients'])))
+        return summarize([ms for timings in per_client for ms in timings], time.perf_counter() - start)
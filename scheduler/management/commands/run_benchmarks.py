@@ -0,0 +1,178 @@
+import json
+import platform
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from scheduler.models import CustomUser, SupportReply, SupportTicket
+from tasks.models import Task, TaskHistory
+
+
+class Rollback(Exception):
+    """Raised to undo a mutating benchmark iteration."""
+
+
+def cold(run):
+    """Mark a scenario to run with an empty cache every iteration."""
+    run.cold = True
+    return run
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot paths in-process with django.test.Client and write JSON results '
+        '(p50/p95 latency and SQL query counts) for diffing across commits and data sizes. '
+        'Cached pages are measured cold (cache cleared before every request) and, as *_cached, warm.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--pages', type=int, default=20, help='How many cursor pages deep to walk the task list.')
+        parser.add_argument('--reassign', type=int, default=200, help='Tasks moved per bulk reassignment.')
+        parser.add_argument('--label', default='', help='Free-form label stored with the results.')
+        parser.add_argument('--output', help='Write JSON here instead of stdout.')
+        parser.add_argument('--only', nargs='*', help='Run only these scenarios.')
+
+    def handle(self, *args, **options):
+        supervisor = CustomUser.objects.filter(role='supervisor').order_by('id').first()
+        intern = (
+            CustomUser.objects.filter(role='intern')
+            .annotate(n=Count('assigned_tasks')).order_by('-n', 'id').first()
+        )
+        if not supervisor or not intern:
+            raise CommandError('Need at least one supervisor and one intern; run seed_synthetic_data first.')
+        self.options = options
+
+        setup_test_environment()  # allows the 'testserver' host and locmem email
+        try:
+            supervisor_client, intern_client = Client(), Client()
+            supervisor_client.force_login(supervisor)
+            intern_client.force_login(intern)
+            scenarios = self.scenarios(supervisor_client, intern_client, supervisor, intern)
+            results = {}
+            for name, run in scenarios.items():
+                if options['only'] and name not in options['only']:
+                    continue
+                self.stderr.write(f'{name}...')
+                results[name] = self.measure(run)
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'label': options['label'],
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'dataset': {
+                'users': CustomUser.objects.count(),
+                'tasks': Task.objects.count(),
+                'task_history': TaskHistory.objects.count(),
+                'support_tickets': SupportTicket.objects.count(),
+                'support_replies': SupportReply.objects.count(),
+            },
+            'results': results,
+        }
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stderr.write(f'Wrote {options["output"]}')
+        else:
+            self.stdout.write(payload)
+
+    def measure(self, run):
+        timings, query_counts, statuses = [], [], set()
+        for i in range(self.options['warmup'] + self.options['iterations']):
+            if getattr(run, 'cold', False):
+                cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                status = run()
+                elapsed = time.perf_counter() - start
+            if i < self.options['warmup']:
+                continue
+            timings.append(elapsed * 1000)
+            query_counts.append(len(ctx.captured_queries))
+            statuses.add(status)
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'queries': max(query_counts),
+            'status_codes': sorted(statuses),
+        }
+
+    def scenarios(self, supervisor_client, intern_client, supervisor, intern):
+        task_list = reverse('tasks:task_list')
+
+        def get(client, url, params=None):
+            response = client.get(url, params or {})
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response.status_code
+
+        # Cursor for a deep page, resolved once so each iteration is a single request
+        deep_cursor = None
+        page_cursor = None
+        for _ in range(self.options['pages']):
+            response = intern_client.get(task_list, {'cursor': page_cursor} if page_cursor else {})
+            page = response.context['cursor_page'] if response.context else None
+            if not page or not page.has_next:
+                break
+            deep_cursor = page_cursor = page.next_cursor
+
+        reassign_ids = list(
+            Task.objects.filter(assigned_to=intern).order_by('id').values_list('id', flat=True)[:self.options['reassign']]
+        )
+        status_task = Task.objects.filter(assigned_to=intern).exclude(status='completed').order_by('id').first()
+
+        def rolled_back(fn):
+            def run():
+                try:
+                    with transaction.atomic():
+                        status = fn()
+                        raise Rollback(status)
+                except Rollback as exc:
+                    return exc.args[0]
+                finally:
+                    # Cache versions live outside the database and were bumped
+                    # for the undone writes; start the next scenario clean
+                    cache.clear()
+            return run
+
+        scenarios = {
+            'dashboard_supervisor': cold(lambda: get(supervisor_client, reverse('dashboard'))),
+            'dashboard_intern': cold(lambda: get(intern_client, reverse('dashboard'))),
+            'dashboard_supervisor_cached': lambda: get(supervisor_client, reverse('dashboard')),
+            'dashboard_intern_cached': lambda: get(intern_client, reverse('dashboard')),
+            'task_list_first_page': lambda: get(intern_client, task_list),
+            'task_list_deep_page': lambda: get(intern_client, task_list, {'cursor': deep_cursor} if deep_cursor else {}),
+            'tasks_time_series': lambda: get(supervisor_client, reverse('tasks_time_series')),
+            'export_team_summary_csv': lambda: get(supervisor_client, reverse('export_team_summary')),
+            'bulk_reassign': rolled_back(lambda: supervisor_client.post(
+                reverse('bulk_reassign'), {'task_ids': reassign_ids, 'assigned_to': supervisor.pk},
+            ).status_code),
+        }
+        if status_task:
+            scenarios['update_task_status'] = rolled_back(lambda: intern_client.get(
+                reverse('tasks:update_task_status', args=[status_task.pk, 'completed'])
+            ).status_code)
+        return scenarios
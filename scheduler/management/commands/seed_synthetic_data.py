@@ -0,0 +1,189 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from scheduler.models import CustomUser, SupportReply, SupportTicket
+from tasks.models import Task, TaskChange, TaskHistory
+
+STATUS_WEIGHTS = {'todo': 35, 'in_progress': 25, 'completed': 35, 'blocked': 5}
+PRIORITY_WEIGHTS = {'low': 30, 'medium': 50, 'high': 20}
+TICKET_STATUS_WEIGHTS = {'open': 30, 'in_progress': 20, 'resolved': 35, 'closed': 15}
+BATCH_SIZE = 2000
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the timestamps we generate instead of ``now()``."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic organisation (users, groups, tasks with history, support tickets with replies) '
+        'for benchmarking. Run it against a scratch database; it refuses to reuse an existing prefix.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supervisors', type=int, default=5)
+        parser.add_argument('--interns', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--tasks', type=int, default=300_000)
+        parser.add_argument('--tickets', type=int, default=5_000)
+        parser.add_argument('--max-replies', type=int, default=3, help='Replies per ticket are drawn from 0..N.')
+        parser.add_argument('--days', type=int, default=180, help='Spread creation dates over this many days.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; same seed, same data.')
+        parser.add_argument('--prefix', default='synthetic', help='Username and group name prefix.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Users with prefix "{prefix}_" already exist; use another --prefix or a fresh database.')
+
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        window = timedelta(days=options['days'])
+
+        with transaction.atomic():
+            supervisors, interns = self.create_users(prefix, options)
+            self.create_groups(prefix, options['groups'], interns)
+            with explicit_timestamps(Task, TaskHistory, SupportTicket, SupportReply):
+                self.create_tasks(rng, now, window, supervisors, interns, options['tasks'])
+                self.create_tickets(rng, now, window, supervisors, interns, options['tickets'], options['max_replies'])
+
+        # Derived tables are rebuilt from scratch rather than maintained row by row
+        call_command('rebuild_task_counters', stdout=self.stdout)
+        call_command('rebuild_task_rollup', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Synthetic data ready.'))
+
+    def create_users(self, prefix, options):
+        password = make_password('password')  # hash once, reuse for every account
+        users = [
+            CustomUser(username=f'{prefix}_sup_{i:04d}', role='supervisor', password=password, is_staff=True)
+            for i in range(options['supervisors'])
+        ] + [
+            CustomUser(username=f'{prefix}_intern_{i:05d}', role='intern', password=password,
+                       first_name=f'Intern {i}', email=f'{prefix}_intern_{i}@example.com')
+            for i in range(options['interns'])
+        ]
+        CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        users = CustomUser.objects.filter(username__startswith=f'{prefix}_')
+        supervisors = list(users.filter(role='supervisor').values_list('id', flat=True))
+        interns = list(users.filter(role='intern').values_list('id', flat=True))
+        self.stdout.write(f'Created {len(supervisors)} supervisors and {len(interns)} interns.')
+        return supervisors, interns
+
+    def create_groups(self, prefix, count, interns):
+        if not count:
+            return
+        Group.objects.bulk_create([Group(name=f'{prefix}_group_{i:03d}') for i in range(count)])
+        groups = list(Group.objects.filter(name__startswith=f'{prefix}_group_').values_list('id', flat=True))
+        Membership = CustomUser.groups.through
+        Membership.objects.bulk_create(
+            [Membership(customuser_id=intern, group_id=groups[i % len(groups)]) for i, intern in enumerate(interns)],
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f'Created {len(groups)} groups.')
+
+    def create_tasks(self, rng, now, window, supervisors, interns, total):
+        created = 0
+        while created < total:
+            batch = []
+            for i in range(created, min(created + BATCH_SIZE, total)):
+                created_at = now - window * rng.random()
+                status = weighted(rng, STATUS_WEIGHTS)
+                priority = weighted(rng, PRIORITY_WEIGHTS)
+                completed_at = None
+                if status == 'completed':
+                    completed_at = min(now, created_at + timedelta(hours=rng.uniform(1, 24 * 20)))
+                updated_at = completed_at or min(now, created_at + timedelta(hours=rng.uniform(0, 24 * 10)))
+                batch.append(Task(
+                    title=f'Synthetic task {i}',
+                    description='Generated for benchmarking.',
+                    created_by_id=rng.choice(supervisors),
+                    assigned_to_id=rng.choice(interns) if rng.random() < 0.97 else None,
+                    priority=priority,
+                    priority_rank=Task.PRIORITY_RANKS[priority],
+                    status=status,
+                    created_at=created_at,
+                    updated_at=updated_at,
+                    completed_at=completed_at,
+                    due_date=None if rng.random() < 0.1 else created_at + timedelta(days=rng.uniform(1, 30)),
+                    requires_approval=rng.random() < 0.1,
+                ))
+            Task.objects.bulk_create(batch)
+            # bulk_create on SQLite returns primary keys, so history can follow immediately
+            history = []
+            for task in batch:
+                actor = task.created_by_id
+                history.append(TaskHistory(task_id=task.pk, actor_id=actor, action='created', old_value='',
+                                           new_value=task.title, timestamp=task.created_at))
+                if task.status != 'todo':
+                    history.append(TaskHistory(task_id=task.pk, actor_id=task.assigned_to_id or actor,
+                                               action='status_changed', old_value='todo', new_value=task.status,
+                                               timestamp=task.updated_at))
+                if rng.random() < 0.15:
+                    history.append(TaskHistory(task_id=task.pk, actor_id=actor, action='assigned_changed',
+                                               old_value=str(rng.choice(interns)), new_value=str(task.assigned_to_id),
+                                               timestamp=task.created_at + (task.updated_at - task.created_at) / 2))
+            TaskHistory.objects.bulk_create(history, batch_size=BATCH_SIZE)
+            # One change feed row per task, as the 0010 migration backfills, so
+            # a feed read from the start lists the seeded tasks too
+            TaskChange.objects.bulk_create(
+                [TaskChange(task_id=task.pk, assigned_to_id=task.assigned_to_id, changed_at=task.updated_at)
+                 for task in batch],
+                batch_size=BATCH_SIZE,
+            )
+            created += len(batch)
+            self.stdout.write(f'  tasks: {created}/{total}')
+
+    def create_tickets(self, rng, now, window, supervisors, interns, total, max_replies):
+        created = 0
+        while created < total:
+            batch = []
+            for i in range(created, min(created + BATCH_SIZE, total)):
+                created_at = now - window * rng.random()
+                priority = weighted(rng, PRIORITY_WEIGHTS)
+                batch.append(SupportTicket(
+                    subject=f'Synthetic ticket {i}',
+                    description='Generated for benchmarking.',
+                    created_by_id=rng.choice(interns),
+                    assigned_to_id=rng.choice(supervisors) if rng.random() < 0.5 else None,
+                    status=weighted(rng, TICKET_STATUS_WEIGHTS),
+                    priority=priority,
+                    priority_rank=SupportTicket.PRIORITY_RANKS[priority],
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            SupportTicket.objects.bulk_create(batch)
+            replies = [
+                SupportReply(ticket_id=ticket.pk, responder_id=rng.choice(supervisors), message='Synthetic reply.',
+                             created_at=min(now, ticket.created_at + timedelta(hours=rng.uniform(1, 72))))
+                for ticket in batch
+                for _ in range(rng.randint(0, max_replies))
+            ]
+            SupportReply.objects.bulk_create(replies, batch_size=BATCH_SIZE)
+            created += len(batch)
+        self.stdout.write(f'Created {total} support tickets.')
@@ -0,0 +1,38 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from scheduler.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails in batches over a reused connection, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when nothing is due.')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit.')
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                try:
+                    sent, failed = deliver_batch(connection, batch_size=options['batch_size'])
+                except Exception as exc:
+                    # Drop a broken connection; the next batch reconnects
+                    connection.close()
+                    if options['once']:
+                        raise
+                    self.stderr.write(f'Delivery batch failed: {exc}')
+                    time.sleep(options['interval'])
+                    continue
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent}, failed {failed}.')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from scheduler.database import is_lock_error
+from scheduler.models import CustomUser
+from tasks.bulk import bulk_reassign
+from tasks.models import Task
+
+PREFIX = 'stress-writer-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer the database with concurrent task writes from several threads and report how many '
+        'failed with "database is locked". Creates its own users and tasks and deletes them afterwards. '
+        'Run with DINCHARYA_SQLITE_PRODUCTION=1 to measure the production SQLite profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=50, help='Writes per thread.')
+        parser.add_argument(
+            '--baseline', action='store_true',
+            help='Use deferred transactions without lock retries, as before the production profile.',
+        )
+
+    def handle(self, *args, **options):
+        threads, writes, baseline = options['threads'], options['writes'], options['baseline']
+        if baseline:
+            settings.SQLITE_LOCK_RETRIES = 1
+        users = [
+            CustomUser.objects.create(username=f'{PREFIX}{index}', role='intern')
+            for index in range(threads + 1)
+        ]
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def worker(index):
+            if baseline:
+                connection.ensure_connection()
+                connection.transaction_mode = None
+            user, other = users[index], users[index + 1]
+            tasks = [Task.objects.create(title=f'Stress {index}-{n}', assigned_to=user) for n in range(5)]
+            try:
+                for n in range(writes):
+                    try:
+                        if n % 2:
+                            task = tasks[n % len(tasks)]
+                            task.status = 'in_progress' if task.status == 'todo' else 'todo'
+                            task.save()
+                        else:
+                            # Reads the assignees, then updates them: a read lock upgraded to a write
+                            bulk_reassign([task.pk for task in tasks], other if n % 4 else user)
+                        result = 'ok'
+                    except OperationalError as exc:
+                        if not is_lock_error(exc):
+                            raise
+                        result = 'locked'
+                    with lock:
+                        outcomes[result] += 1
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+        try:
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+        finally:
+            elapsed = time.perf_counter() - started
+            Task.objects.filter(title__startswith='Stress ', assigned_to__username__startswith=PREFIX).delete()
+            CustomUser.objects.filter(username__startswith=PREFIX).delete()
+
+        total = outcomes['ok'] + outcomes['locked']
+        self.stdout.write(
+            f'{"baseline" if baseline else "production"}: {total} writes from {threads} threads in {elapsed:.2f}s, '
+            f'{outcomes["locked"]} failed with "database is locked" '
+            f'({total / elapsed if elapsed else 0:.0f} writes/s).'
+        )
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database to the read replica file with the online backup API, '
+        'then swap it into place. Run it periodically (or with --interval) to keep the replica fresh.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Replica file; defaults to settings.REPLICA_DATABASE_PATH.')
+        parser.add_argument('--interval', type=float, help='Keep copying, sleeping this many seconds between copies.')
+
+    def handle(self, *args, **options):
+        path = options['path'] or getattr(settings, 'REPLICA_DATABASE_PATH', None)
+        if not path:
+            raise CommandError('No replica path; pass --path or set DINCHARYA_REPLICA_DB.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replica copies SQLite databases only; use the database\'s own replication.')
+        while True:
+            started = time.perf_counter()
+            self.copy(primary, path)
+            self.stdout.write(f'Replica {path} refreshed in {time.perf_counter() - started:.2f}s.')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, primary, path):
+        primary.ensure_connection()
+        partial = f'{path}.partial'
+        target = sqlite3.connect(partial)
+        try:
+            primary.connection.backup(target)
+            # Readers open the copy read-only, which rules out WAL's shared-memory file
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+        # Readers never see a half-written copy; open connections keep the old file until they reconnect
+        os.replace(partial, path)
@@ -0,0 +1,82 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+``RequestMetricsMiddleware`` feeds one observation per request into the
+histograms below, labelled by resolved URL name. Each worker process keeps
+its own numbers; scrape every worker to get the full picture.
+"""
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per ``view`` label."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        with self._lock:
+            counts, total = self._series.get(view, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[view] = (counts, total + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {view: (list(counts), total) for view, (counts, total) in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for view, (counts, total) in sorted(self.snapshot().items()):
+            label = _escape(view)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{view="{label}",le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram(
+    'dincharya_request_duration_seconds', 'Wall time spent in the view, per URL name.', LATENCY_BUCKETS,
+)
+sql_queries = Histogram(
+    'dincharya_sql_queries', 'SQL queries issued per request, per URL name.', QUERY_COUNT_BUCKETS,
+)
+sql_duration = Histogram(
+    'dincharya_sql_duration_seconds', 'Total SQL time per request, per URL name.', LATENCY_BUCKETS,
+)
+
+HISTOGRAMS = (request_duration, sql_queries, sql_duration)
+
+
+def record_request(view, wall_time, query_count, query_time):
+    request_duration.observe(view, wall_time)
+    sql_queries.observe(view, query_count)
+    sql_duration.observe(view, query_time)
+
+
+def render_prometheus():
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
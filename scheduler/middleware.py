@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics, replicas
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """A view issued more SQL queries than its ``QUERY_BUDGETS`` entry allows."""
+
+
+class QueryRecorder:
+    """Counts queries and sums their time; queries may come from several threads."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+
+
+# The recorder of the request being served. Context variables follow a
+# request into sync_to_async threads, including the worker threads of
+# async_views.concurrently, so every query it causes is counted.
+_recorder = ContextVar('request_query_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Route every connection's queries through ``record_query``, whichever thread opens it."""
+    if record_query not in connection.execute_wrappers:
+        # First in the list so execute_wrapper() blocks, which pop the last
+        # wrapper, never remove it
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, SQL query count and SQL time for every request.
+
+    Observations are labelled with the resolved URL name (``dashboard``,
+    ``tasks:task_list``, ...) and exposed by the ``metrics`` view. Views
+    listed in ``settings.QUERY_BUDGETS`` log a warning when they exceed
+    their budget, or raise ``QueryBudgetExceeded`` when
+    ``settings.QUERY_BUDGET_RAISE`` is set (``QueryBudgetTestRunner`` sets it
+    for the test suite).
+
+    Streaming responses are measured up to the point the view returns, not
+    until the last byte is sent. Works under WSGI and ASGI; under ASGI it
+    stays on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, recorder, time.perf_counter() - start, response)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, recorder, time.perf_counter() - start, response)
+
+    def finish(self, request, recorder, wall_time, response):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.record_request(view, wall_time, recorder.count, recorder.duration)
+        self.check_budget(view, recorder.count)
+        return response
+
+    def check_budget(self, view, query_count):
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        if budget is None or query_count <= budget:
+            return
+        message = f'{view} issued {query_count} SQL queries (budget {budget})'
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class PrimaryAfterWriteMiddleware:
+    """Keep a user's reads on the primary for a while after they write.
+
+    A request that writes sets a short-lived cookie; while it is present the
+    replica router sends that user's reporting reads to the primary, so
+    nobody sees a replica that has not caught up with their own change.
+    Does nothing unless a replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if replicas.replica_alias() is None:
+            return self.get_response(request)
+        with replicas.request_scope(pinned=replicas.PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        if replicas.replica_alias() is None:
+            return await self.get_response(request)
+        # The request state is a context variable, so writes made in
+        # sync_to_async threads still mark it
+        with replicas.request_scope(pinned=replicas.PIN_COOKIE in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(state, response)
+
+    def pin(self, state, response):
+        if state['wrote']:
+            response.set_cookie(
+                replicas.PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10), httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0003_supportreply'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='role',
+            field=models.CharField(choices=[('supervisor', 'Supervisor'), ('intern', 'Intern')], db_index=True, default='intern', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['status', '-created_at'], name='ticket_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['-created_at'], name='ticket_created_idx'),
+        ),
+    ]
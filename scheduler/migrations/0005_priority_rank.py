@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3}
+
+
+def backfill_priority_rank(apps, schema_editor):
+    SupportTicket = apps.get_model('scheduler', 'SupportTicket')
+    SupportTicket.objects.update(priority_rank=models.Case(
+        *[models.When(priority=priority, then=models.Value(rank)) for priority, rank in PRIORITY_RANKS.items()],
+        default=models.Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportticket',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0006_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='supportticket',
+            name='ticket_status_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='supportticket',
+            name='ticket_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='supportreply',
+            index=models.Index(fields=['ticket', 'created_at'], name='reply_ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='ticket_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['-created_at', '-id'], name='ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['priority', '-created_at', '-id'], name='ticket_priority_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['assigned_to', '-created_at', '-id'], name='ticket_assignee_created_idx'),
+        ),
+    ]
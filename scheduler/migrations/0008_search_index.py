@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:40
+
+from django.db import migrations
+
+TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+
+def create_ticket_search(apps, schema_editor):
+    # The FTS5 index only exists on SQLite; other databases use their own search backend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"CREATE VIRTUAL TABLE ticket_search USING fts5(title, body, people, tokenize = '{TOKENIZER}')")
+    schema_editor.execute(
+        """
+        INSERT INTO ticket_search (rowid, title, body, people)
+        SELECT t.id, t.subject,
+               t.description || coalesce(char(10) || (
+                   SELECT group_concat(r.message, char(10)) FROM scheduler_supportreply r WHERE r.ticket_id = t.id
+               ), ''),
+               trim(coalesce(c.username, '') || ' ' || coalesce(a.username, ''))
+        FROM scheduler_supportticket t
+        LEFT JOIN scheduler_customuser c ON c.id = t.created_by_id
+        LEFT JOIN scheduler_customuser a ON a.id = t.assigned_to_id
+        """
+    )
+
+
+def drop_ticket_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS ticket_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0007_ticket_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_ticket_search, drop_ticket_search),
+    ]
@@ -1,12 +1,29 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
         ('supervisor', 'Supervisor'),
         ('intern', 'Intern'),
     )
-    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='intern')
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='intern', db_index=True)
+
+    # Fields that appear in the search documents of the user's tasks and
+    # tickets, snapshotted on load so only a rename re-indexes them
+    SEARCH_FIELDS = ('username',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: getattr(instance, name) for name in cls.SEARCH_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {name: getattr(self, name) for name in self.SEARCH_FIELDS}
 
 
 class SupportTicket(models.Model):
@@ -23,21 +40,53 @@ class SupportTicket(models.Model):
         ('high', 'High'),
     )
 
+    # Kept in step with Task.PRIORITY_RANKS
+    PRIORITY_RANKS = {
+        'low': 1,
+        'medium': 2,
+        'high': 3,
+    }
+
     subject = models.CharField(max_length=200)
     description = models.TextField()
     created_by = models.ForeignKey(CustomUser, related_name='support_tickets', on_delete=models.CASCADE)
     assigned_to = models.ForeignKey(CustomUser, related_name='assigned_support_tickets', on_delete=models.SET_NULL, null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Ticket list and dashboard: by status, newest first
+            models.Index(fields=['status', '-created_at', '-id'], name='ticket_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='ticket_created_idx'),
+            models.Index(fields=['priority', '-created_at', '-id'], name='ticket_priority_created_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='ticket_assignee_created_idx'),
+        ]
+
+    # Fields the search document is built from, snapshotted on load so saves
+    # that leave them alone skip re-indexing
+    SEARCH_FIELDS = ('subject', 'description', 'created_by_id', 'assigned_to_id')
 
     def __str__(self):
         return f"#{self.id} {self.subject} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: getattr(instance, name) for name in cls.SEARCH_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, 0)
+        super().save(*args, **kwargs)
+        self._loaded_values = {name: getattr(self, name) for name in self.SEARCH_FIELDS}
+
 
 class SupportReply(models.Model):
     """Supervisor replies to support tickets."""
@@ -48,6 +97,44 @@ class SupportReply(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Reply count and latest reply per ticket
+            models.Index(fields=['ticket', 'created_at'], name='reply_ticket_created_idx'),
+        ]
 
     def __str__(self):
         return f"Reply #{self.id} to Ticket #{self.ticket.id}"
+
+
+class OutboxEmail(models.Model):
+    """Email queued for delivery by the ``send_outbox`` worker.
+
+    Rows are written in the same transaction as the change that triggers
+    them, so a mail is queued if and only if that change commits.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # The worker polls for pending rows that are due
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.id} to {', '.join(self.recipients)} ({self.status})"
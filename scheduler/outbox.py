@@ -0,0 +1,114 @@
+"""Transactional outbox for outgoing email.
+
+Request handlers call ``enqueue_email`` inside their transaction; the
+``send_outbox`` worker drains due rows in batches over one SMTP connection
+and retries failures with exponential backoff.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .database import write_transaction
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+# How long a claimed batch is hidden from other workers while it is being sent
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Queue an email; call inside the transaction that should own it."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipients=list(recipients),
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', ''),
+    )
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts`` (1-based): 30s, 60s, 120s, ... capped at an hour."""
+    return min(BACKOFF_BASE * (2 ** (attempts - 1)), BACKOFF_MAX)
+
+
+def _attempt_failed(email, exc, now):
+    """Count a failed attempt at ``email``: back off, or give up after ``MAX_ATTEMPTS``."""
+    email.attempts += 1
+    logger.warning('Outbox email %s failed (attempt %s): %s', email.pk, email.attempts, exc)
+    email.last_error = str(exc)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + backoff(email.attempts)
+
+
+def deliver_batch(connection=None, batch_size=50, now=None):
+    """Send up to ``batch_size`` due emails; returns ``(sent, failed)``.
+
+    ``connection`` is an email backend instance the caller keeps open across
+    batches; one is opened and closed here if omitted.
+
+    Due rows are claimed in one short transaction by pushing their
+    ``next_attempt_at`` out by ``CLAIM_LEASE``, so SMTP traffic never runs
+    while the database write lock is held and other workers skip the batch.
+    If this worker dies mid-batch the claimed rows come due again once the
+    lease expires. If the connection cannot be opened every row in the batch
+    counts a failed attempt and backs off before the error is re-raised.
+    """
+    now = now or timezone.now()
+    with write_transaction():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+        OutboxEmail.objects.filter(id__in=[email.pk for email in batch]).update(next_attempt_at=now + CLAIM_LEASE)
+    for email in batch:
+        # Rows never attempted keep the lease when the batch is written back
+        email.next_attempt_at = now + CLAIM_LEASE
+
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection()
+    sent = failed = 0
+    try:
+        try:
+            connection.open()
+        except Exception as exc:
+            # Nothing can be sent: every row in the batch used up an attempt
+            for email in batch:
+                _attempt_failed(email, exc, now)
+            raise
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email or None, email.recipients, connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                _attempt_failed(email, exc, now)
+                failed += 1
+            else:
+                email.attempts += 1
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+    finally:
+        if owns_connection:
+            connection.close()
+        # Record whatever was attempted, even if the connection failed part way
+        with write_transaction():
+            OutboxEmail.objects.bulk_update(
+                batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+            )
+    return sent, failed
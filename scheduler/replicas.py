@@ -0,0 +1,110 @@
+"""Read replica routing for reporting queries.
+
+Reporting code marks its reads with ``reporting()`` (a context manager and
+decorator); ``ReplicaRouter`` sends reads made inside it to the
+``settings.REPLICA_DATABASE_ALIAS`` database. Everything else, and every
+write, goes to the primary.
+
+Reporting reads still use the primary when:
+
+* no replica is configured;
+* the user wrote recently: ``PrimaryAfterWriteMiddleware`` pins a user to
+  the primary for ``REPLICA_PIN_SECONDS`` after any request that wrote, so
+  people always see their own changes despite replication lag;
+* the replica cannot be connected to; it is then skipped for
+  ``REPLICA_RETRY_SECONDS`` before being tried again.
+
+Locally the replica is a read-only copy of the SQLite file refreshed by the
+``sync_replica`` command (see ``REPLICA_DATABASE_PATH`` in settings).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'primary_reads'
+
+_reporting = ContextVar('replica_reporting', default=False)
+# Per-request state set by PrimaryAfterWriteMiddleware: {'pinned': bool, 'wrote': bool}
+_request_state = ContextVar('replica_request_state', default=None)
+# Replica alias -> time.monotonic() before which it is not retried
+_down_until = {}
+
+
+def replica_alias():
+    """The configured replica alias, or None."""
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+    return alias if alias and alias in connections.settings else None
+
+
+def is_available(alias):
+    """Whether ``alias`` can be connected to, remembering failures for ``REPLICA_RETRY_SECONDS``."""
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError as exc:
+        logger.warning('Replica %s unavailable, reading from the primary: %s', alias, exc)
+        _down_until[alias] = time.monotonic() + getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+        return False
+    _down_until.pop(alias, None)
+    return True
+
+
+def pinned_to_primary():
+    state = _request_state.get()
+    return bool(state and (state['pinned'] or state['wrote']))
+
+
+def reporting_alias():
+    """The alias a reporting read should use right now."""
+    alias = replica_alias()
+    if alias is None or pinned_to_primary() or not is_available(alias):
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+@contextmanager
+def reporting():
+    """Route reads made inside the block to the replica when it is safe to."""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+@contextmanager
+def request_scope(pinned):
+    """Track one request: ``pinned`` if the user wrote recently; records whether it writes."""
+    state = {'pinned': pinned, 'wrote': False}
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reporting.get():
+            return reporting_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replica hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
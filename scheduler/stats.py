@@ -0,0 +1,98 @@
+"""Dashboard statistics.
+
+Every counter shown on the dashboards is computed here with conditional
+aggregates, so a page costs a fixed number of queries no matter how many
+interns or tasks exist.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from tasks.models import Task
+from .models import CustomUser, SupportTicket
+
+
+def overdue_q(now=None, prefix=''):
+    """Q object matching tasks past their due date that are not completed."""
+    now = now or timezone.now()
+    return Q(**{f'{prefix}due_date__lt': now}) & ~Q(**{f'{prefix}status': 'completed'})
+
+
+def _task_counters(scope, now):
+    """Conditional aggregates for the tasks matching ``scope``."""
+    return {
+        'total': Count('id', filter=scope),
+        'completed': Count('id', filter=scope & Q(status='completed')),
+        'in_progress': Count('id', filter=scope & Q(status='in_progress')),
+        'overdue': Count('id', filter=scope & overdue_q(now)),
+    }
+
+
+def task_stats(user, include_team=False):
+    """Return task counters for ``user`` and, optionally, the intern team.
+
+    Both sets of counters come back from a single aggregate query:
+    ``{'user': {...}, 'team': {...}}`` where each dict holds ``total``,
+    ``completed``, ``in_progress`` and ``overdue``.
+    """
+    now = timezone.now()
+    scopes = {'user': Q(assigned_to=user)}
+    if include_team:
+        scopes['team'] = Q(assigned_to__role='intern')
+
+    aggregates = {}
+    for name, scope in scopes.items():
+        for key, expr in _task_counters(scope, now).items():
+            aggregates[f'{name}__{key}'] = expr
+
+    # Restrict to the relevant assignees with one IN (subquery) so the
+    # assigned_to index drives the scan instead of an OR across a join
+    assignees = CustomUser.objects.filter(pk=user.pk)
+    if include_team:
+        assignees = CustomUser.objects.filter(Q(pk=user.pk) | Q(role='intern'))
+    row = Task.objects.filter(assigned_to__in=assignees.values('pk')).aggregate(**aggregates)
+
+    stats = {name: {} for name in scopes}
+    for alias, value in row.items():
+        name, key = alias.split('__', 1)
+        stats[name][key] = value or 0
+    return stats
+
+
+def ticket_stats():
+    """Return support ticket counters by status in a single aggregate query."""
+    row = SupportTicket.objects.filter(status__in=['open', 'in_progress']).aggregate(
+        open=Count('id', filter=Q(status='open')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+    )
+    return {key: value or 0 for key, value in row.items()}
+
+
+def team_summary():
+    """Interns annotated with their assigned/completed/in-progress/overdue counts.
+
+    The stored counters come from ``TaskCounter`` (one joined row per
+    intern); only the clock-dependent overdue count touches ``Task``, via a
+    correlated count over that intern's overdue tasks.
+    """
+    overdue = (
+        Task.objects.filter(overdue_q(), assigned_to=OuterRef('pk'))
+        .order_by()
+        .values('assigned_to')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    return CustomUser.objects.filter(role='intern').annotate(
+        assigned_count=Coalesce(F('task_counter__assigned_count'), 0),
+        completed_count=Coalesce(F('task_counter__completed_count'), 0),
+        inprogress_count=Coalesce(F('task_counter__in_progress_count'), 0),
+        overdue_count=Coalesce(Subquery(overdue), 0),
+    )
+
+
+def completion_rate(counters):
+    """Percentage of completed tasks in a counters dict, rounded to one decimal."""
+    total = counters.get('total') or 0
+    if not total:
+        return 0
+    return round((counters.get('completed', 0) / total) * 100, 1)
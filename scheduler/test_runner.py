@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """Test runner that turns every ``QUERY_BUDGETS`` overrun into a failure.
+
+    Outside tests an overrun only logs a warning; under test it raises
+    ``QueryBudgetExceeded`` so a view that grows past its budget fails the
+    suite instead of scrolling by in the output.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._budget_raise = settings.QUERY_BUDGET_RAISE
+        settings.QUERY_BUDGET_RAISE = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.QUERY_BUDGET_RAISE = self._budget_raise
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,641 @@
-from django.test import TestCase
+import asyncio
+import io
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import Task
+from . import async_views, caching, events, metrics, replicas, views
+from .database import retry_on_lock
+from .middleware import PrimaryAfterWriteMiddleware, QueryBudgetExceeded, RequestMetricsMiddleware
+from .models import CustomUser, OutboxEmail, SupportReply, SupportTicket
+from .outbox import MAX_ATTEMPTS, backoff, deliver_batch
+from .stats import task_stats, ticket_stats
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        self.interns = []
+
+    def add_interns(self, count, tasks_each):
+        past = timezone.now() - timedelta(days=1)
+        for _ in range(count):
+            intern = CustomUser.objects.create_user(f'intern{len(self.interns)}', role='intern')
+            self.interns.append(intern)
+            for i in range(tasks_each):
+                Task.objects.create(
+                    title=f'{intern.username} task {i}',
+                    assigned_to=intern,
+                    created_by=self.supervisor,
+                    status=['todo', 'in_progress', 'completed'][i % 3],
+                    due_date=past,
+                )
+            SupportTicket.objects.create(subject='help', description='...', created_by=intern)
+
+    def dashboard_query_count(self, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_task_stats_counts(self):
+        self.add_interns(2, 3)
+        stats = task_stats(self.supervisor, include_team=True)
+        self.assertEqual(stats['user']['total'], 0)
+        self.assertEqual(stats['team'], {'total': 6, 'completed': 2, 'in_progress': 2, 'overdue': 4})
+        self.assertEqual(ticket_stats(), {'open': 2, 'in_progress': 0})
+
+    def test_supervisor_dashboard_query_count_is_constant(self):
+        self.add_interns(1, 1)
+        baseline = self.dashboard_query_count(self.supervisor)
+        self.add_interns(10, 5)
+        self.assertEqual(self.dashboard_query_count(self.supervisor), baseline)
+
+    def test_intern_dashboard_query_count_is_constant(self):
+        self.add_interns(1, 1)
+        intern = self.interns[0]
+        baseline = self.dashboard_query_count(intern)
+        for i in range(10):
+            Task.objects.create(title=f'extra {i}', assigned_to=intern)
+            SupportTicket.objects.create(subject='more', description='...', created_by=intern)
+        self.assertEqual(self.dashboard_query_count(intern), baseline)
+
+    def test_dashboard_is_cached_until_its_data_changes(self):
+        self.add_interns(2, 2)
+        intern = self.interns[0]
+        cold = self.dashboard_query_count(self.supervisor)
+        warm = self.dashboard_query_count(self.supervisor)
+        self.assertLess(warm, cold)
+
+        # Another intern's task invalidates the team figures only
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='late', assigned_to=self.interns[1], status='completed')
+        self.assertEqual(self.dashboard_query_count(self.supervisor), cold)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['team_overview']['completed'], 1)
+
+        self.dashboard_query_count(intern)
+        intern_warm = self.dashboard_query_count(intern)
+        ticket = SupportTicket.objects.filter(created_by=intern).get()
+        SupportReply.objects.create(ticket=ticket, responder=self.supervisor, message='on it')
+        self.assertGreater(self.dashboard_query_count(intern), intern_warm)
+
+    def test_deleting_a_task_removes_its_history_without_loading_it(self):
+        self.add_interns(1, 1)
+        task = Task.objects.get()
+        for status in ('in_progress', 'completed', 'todo'):
+            task.status = status
+            task.save()
+        with CaptureQueriesContext(connection) as ctx:
+            task.delete()
+        history = [q['sql'] for q in ctx.captured_queries if 'tasks_taskhistory"' in q['sql']]
+        self.assertEqual(len(history), 1)
+        self.assertTrue(history[0].startswith('DELETE'))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        self.intern = CustomUser.objects.create_user('intern', role='intern', first_name='Ina')
+        for status in ('todo', 'completed', 'completed'):
+            Task.objects.create(title=f'{status} task', assigned_to=self.intern, status=status)
+        self.client.force_login(self.supervisor)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return [line for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_team_summary_streams_counters(self):
+        lines = self.read_csv(self.client.get(reverse('export_team_summary')))
+        self.assertEqual(lines[1], f'{self.intern.id},intern,Ina,3,0,2,0,66.7')
+
+    def test_task_export_filters_and_history_columns(self):
+        response = self.client.get(reverse('export_tasks'), {'status': 'completed', 'history': '1'})
+        lines = self.read_csv(response)
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].endswith('History Entries,Last Action,Last Action At'))
+        self.assertIn(',1,created,', lines[1])
+
+
+class QueryPlanTests(TestCase):
+    """Run EXPLAIN QUERY PLAN on every query the hot views issue.
+
+    Fails if any query against an app table falls back to a full table scan
+    (``SCAN <table>`` without an index).
+    """
+    APP_TABLES = ('tasks_', 'scheduler_')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        cls.root = CustomUser.objects.create_superuser('root', role='supervisor')
+        cls.intern = CustomUser.objects.create_user('intern', role='intern')
+        past = timezone.now() - timedelta(days=3)
+        for i in range(30):
+            Task.objects.create(
+                title=f'task {i}', assigned_to=cls.intern, created_by=cls.supervisor,
+                status=['todo', 'in_progress', 'completed'][i % 3], due_date=past + timedelta(days=i % 5),
+            )
+            ticket = SupportTicket.objects.create(subject=f'ticket {i}', description='...', created_by=cls.intern)
+            SupportReply.objects.create(ticket=ticket, responder=cls.supervisor, message='ok')
+
+    def explain_queries(self, user, url, params=None):
+        """Request ``url`` as ``user`` and return ``(sql, plan_rows)`` for each app SELECT."""
+        self.client.force_login(user)
+        executed = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            b''.join(response.streaming_content)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, query_params in executed:
+                if not any(f'"{prefix}' in sql for prefix in self.APP_TABLES):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', query_params)
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def assertNoFullScans(self, plans):
+        for sql, rows in plans:
+            for detail in rows:
+                words = detail.split()
+                is_full_scan = (
+                    words[0] == 'SCAN' and len(words) == 2
+                    and words[1].startswith(self.APP_TABLES)
+                )
+                self.assertFalse(is_full_scan, f'Full table scan ({detail}) in:\n{sql}\nplan: {rows}')
+
+    def test_task_list(self):
+        url = reverse('tasks:task_list')
+        self.assertNoFullScans(self.explain_queries(self.intern, url))
+        self.assertNoFullScans(self.explain_queries(self.intern, url, {'status': 'todo'}))
+        self.assertNoFullScans(self.explain_queries(self.supervisor, url, {'assigned_to': self.intern.pk}))
+        self.assertNoFullScans(self.explain_queries(self.root, url))
+
+    def test_search(self):
+        self.assertNoFullScans(self.explain_queries(self.intern, reverse('tasks:task_list'), {'q': 'task 1'}))
+        self.assertNoFullScans(self.explain_queries(self.root, reverse('tasks:task_list'), {'q': 'task'}))
+        self.assertNoFullScans(self.explain_queries(self.supervisor, reverse('support_list'), {'q': 'ticket'}))
+
+    def test_admin_changelists(self):
+        year = timezone.now().year
+        for name, params in (
+            ('admin:tasks_task_changelist', {}),
+            ('admin:tasks_task_changelist', {'due_date__year': year}),
+            ('admin:tasks_taskhistory_changelist', {}),
+            ('admin:tasks_taskhistory_changelist', {'timestamp__year': year}),
+            ('admin:scheduler_supportticket_changelist', {}),
+        ):
+            self.assertNoFullScans(self.explain_queries(self.root, reverse(name), params))
+
+    def test_dashboard(self):
+        self.assertNoFullScans(self.explain_queries(self.supervisor, reverse('dashboard')))
+        self.assertNoFullScans(self.explain_queries(self.intern, reverse('dashboard')))
+
+    def test_tasks_time_series(self):
+        self.assertNoFullScans(self.explain_queries(self.supervisor, reverse('tasks_time_series')))
+
+    def test_support_ticket_list(self):
+        url = reverse('support_list')
+        self.assertNoFullScans(self.explain_queries(self.supervisor, url))
+        self.assertNoFullScans(self.explain_queries(self.supervisor, url, {'status': 'open'}))
+        self.assertNoFullScans(self.explain_queries(self.supervisor, url, {'priority': 'high'}))
+        self.assertNoFullScans(self.explain_queries(self.supervisor, url, {'assigned_to': 'none'}))
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        self.intern = CustomUser.objects.create_user('intern', role='intern')
+
+    def test_metrics_endpoint_reports_per_view_histograms(self):
+        self.client.force_login(self.supervisor)
+        self.client.get(reverse('dashboard'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE dincharya_request_duration_seconds histogram', body)
+        self.assertIn('dincharya_sql_queries_count{view="dashboard"} 1', body)
+        self.assertIn('dincharya_sql_duration_seconds_bucket{view="dashboard",le="+Inf"} 1', body)
+
+    def test_metrics_endpoint_is_supervisor_only(self):
+        self.client.force_login(self.intern)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(QUERY_BUDGETS={'dashboard': 1})
+    def test_query_budget_raises_under_test(self):
+        self.client.force_login(self.intern)
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('dashboard'))
+
+    @override_settings(QUERY_BUDGETS={'dashboard': 1}, QUERY_BUDGET_RAISE=False)
+    def test_query_budget_warns_by_default(self):
+        self.client.force_login(self.intern)
+        with self.assertLogs('scheduler.middleware', 'WARNING'):
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+    async def test_middleware_stays_async_and_counts_worker_thread_queries(self):
+        def count_groups():
+            try:
+                return Group.objects.count()
+            finally:
+                connection.close()
+
+        async def view(request):
+            await sync_to_async(Group.objects.count)()
+            # A separate worker thread with its own connection, as in async_views.concurrently
+            await sync_to_async(count_groups, thread_sensitive=False)()
+            return HttpResponse()
+
+        for middleware_class in (RequestMetricsMiddleware, PrimaryAfterWriteMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware_class(view)))
+        middleware = RequestMetricsMiddleware(view)
+        request = AsyncRequestFactory().get('/')
+        with override_settings(QUERY_BUDGETS={'unresolved': 2}):
+            await middleware(request)
+        with override_settings(QUERY_BUDGETS={'unresolved': 1}), self.assertRaises(QueryBudgetExceeded):
+            await middleware(request)
+
+
+class FailingEmailBackend:
+    """Email backend whose sends always fail, to exercise retries."""
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        raise OSError('SMTP unavailable')
+
+
+class UnreachableEmailBackend(FailingEmailBackend):
+    """Email backend that cannot connect at all."""
+
+    def open(self):
+        raise OSError('Connection refused')
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        self.intern = CustomUser.objects.create_user('intern', role='intern', email='intern@example.com')
+        self.ticket = SupportTicket.objects.create(subject='VPN', description='...', created_by=self.intern)
+
+    def test_reply_queues_email_instead_of_sending(self):
+        self.client.force_login(self.supervisor)
+        response = self.client.post(reverse('support_detail', args=[self.ticket.pk]), {'message': 'Try again'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.recipients, ['intern@example.com'])
+
+        self.assertEqual(deliver_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Try again', mail.outbox[0].body)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'sent')
+        self.assertEqual(deliver_batch(), (0, 0))
+
+    def test_failures_back_off_then_give_up(self):
+        email = OutboxEmail.objects.create(subject='s', body='b', recipients=['x@example.com'])
+        now = timezone.now()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.assertEqual(deliver_batch(FailingEmailBackend(), now=now), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempt)
+            if attempt < MAX_ATTEMPTS:
+                self.assertEqual(email.next_attempt_at, now + backoff(attempt))
+                # not due yet
+                self.assertEqual(deliver_batch(FailingEmailBackend(), now=now), (0, 0))
+                now = email.next_attempt_at
+        self.assertEqual(email.status, 'failed')
+        self.assertIn('SMTP unavailable', email.last_error)
+
+    def test_connection_failure_backs_off_the_whole_batch(self):
+        emails = [OutboxEmail.objects.create(subject='s', body='b', recipients=['x@example.com']) for _ in range(2)]
+        now = timezone.now()
+        with self.assertRaises(OSError):
+            deliver_batch(UnreachableEmailBackend(), now=now)
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.next_attempt_at, now + backoff(1))
+            self.assertIn('Connection refused', email.last_error)
+        # Not due again until the backoff has passed
+        self.assertEqual(deliver_batch(UnreachableEmailBackend(), now=now), (0, 0))
+
+    def test_batch_is_claimed_before_sending(self):
+        email = OutboxEmail.objects.create(subject='s', body='b', recipients=['x@example.com'])
+        now = timezone.now()
+
+        class CrashingBackend(FailingEmailBackend):
+            def send_messages(self, messages):
+                # Another worker polling mid-send must not pick the row up
+                self.seen = OutboxEmail.objects.filter(status='pending', next_attempt_at__lte=now).count()
+                raise OSError('SMTP unavailable')
+
+        backend = CrashingBackend()
+        deliver_batch(backend, now=now)
+        self.assertEqual(backend.seen, 0)
+        email.refresh_from_db()
+        self.assertEqual(email.next_attempt_at, now + backoff(1))
+
+
+class DatabaseProfileTests(TestCase):
+    def test_retry_on_lock_retries_only_lock_errors(self):
+        calls = []
+
+        def locked_twice():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+
+        self.assertEqual(retry_on_lock(locked_twice, attempts=5, base_delay=0.001), 'done')
+        self.assertEqual(len(calls), 3)
+
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            retry_on_lock(locked_twice, attempts=2, base_delay=0.001)
+        self.assertEqual(len(calls), 2)
+
+        def broken():
+            calls.append(1)
+            raise OperationalError('no such table: missing')
+
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            retry_on_lock(broken, attempts=5, base_delay=0.001)
+        self.assertEqual(len(calls), 1)
+
+    def production_profile(self, **database):
+        """Settings for connections opened from here on, as with DINCHARYA_SQLITE_PRODUCTION=1."""
+        database['OPTIONS'] = dict(settings.SQLITE_PRODUCTION_OPTIONS)
+        self.enterContext(mock.patch.dict(connections.settings['default'], database))
+        self.enterContext(override_settings(SQLITE_PRAGMAS=settings.SQLITE_PRODUCTION_PRAGMAS))
+
+    def test_production_profile_applied_to_new_connections(self):
+        self.production_profile()
+        profiled = connections.create_connection('default')
+        self.addCleanup(profiled.close)
+        with profiled.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+        self.assertEqual(profiled.transaction_mode, 'IMMEDIATE')
+
+    def test_stress_writes_on_a_file_database_hits_no_locks(self):
+        # The in-memory test database has no journal to speak of, so run the
+        # command from a fresh thread, whose connections open a real file
+        self.production_profile(NAME=os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'stress.sqlite3'))
+        out, failures = io.StringIO(), []
+
+        def run():
+            try:
+                call_command('migrate', verbosity=0)
+                call_command('stress_writes', threads=4, writes=10, stdout=out)
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    failures.append(cursor.fetchone()[0])
+            except BaseException as exc:
+                failures.append(exc)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(failures, ['wal'])
+        self.assertIn('40 writes from 4 threads', out.getvalue())
+        self.assertIn(' 0 failed with "database is locked"', out.getvalue())
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        # A replica alias whose file does not exist
+        configured = connections.configure_settings({
+            'default': connection.settings_dict,
+            'replica': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': 'file:/nonexistent/replica.sqlite3?mode=ro',
+                'OPTIONS': {'uri': True},
+            },
+        })
+        patcher = mock.patch.dict(connections.settings, {'replica': configured['replica']})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(replicas._down_until.clear)
+
+    def test_reporting_reads_use_the_replica_unless_pinned(self):
+        with mock.patch.object(replicas, 'is_available', return_value=True):
+            self.assertEqual(Task.objects.all().db, 'default')
+            with replicas.reporting():
+                self.assertEqual(Task.objects.all().db, 'replica')
+                with replicas.request_scope(pinned=True):
+                    self.assertEqual(Task.objects.all().db, 'default')
+                with replicas.request_scope(pinned=False):
+                    self.assertEqual(Task.objects.all().db, 'replica')
+                    CustomUser.objects.create_user('writer')
+                    # Read your own writes for the rest of the request
+                    self.assertEqual(Task.objects.all().db, 'default')
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        failure = OperationalError('unable to open database file')
+        with mock.patch.object(connections['replica'], 'ensure_connection', side_effect=failure), \
+                replicas.reporting():
+            self.assertEqual(Task.objects.all().db, 'default')
+            self.assertEqual(Task.objects.count(), 0)
+        self.assertIn('replica', replicas._down_until)
+
+    def test_writing_request_pins_user_to_primary(self):
+        supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        intern = CustomUser.objects.create_user('intern', role='intern')
+        ticket = SupportTicket.objects.create(subject='VPN', description='...', created_by=intern)
+        self.client.force_login(supervisor)
+        response = self.client.get(reverse('support_detail', args=[ticket.pk]))
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+        response = self.client.post(reverse('support_detail', args=[ticket.pk]), {'message': 'Still broken'})
+        self.assertEqual(response.cookies[replicas.PIN_COOKIE]['max-age'], 10)
+
+
+    @mock.patch.object(replicas, 'is_available', return_value=False)
+    def test_pinned_user_skips_team_fragment_cached_from_the_replica(self, is_available):
+        supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        lagging = views.dashboard_team_data()
+        CustomUser.objects.create_user('intern', role='intern')
+        # Another supervisor's request read the lagging replica after the
+        # change and cached it under the new team version
+        with replicas.request_scope(pinned=False):
+            caching.cached('dashboard:team', [caching.TEAM], lambda: lagging, reporting=True)
+        self.client.force_login(supervisor)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['interns_count'], 0)
+        self.client.cookies[replicas.PIN_COOKIE] = '1'
+        self.assertEqual(self.client.get(reverse('dashboard')).context['interns_count'], 1)
+
+
+class SupportTicketListTests(TestCase):
+    def setUp(self):
+        self.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        self.intern = CustomUser.objects.create_user('intern', role='intern')
+        self.tickets = [
+            SupportTicket.objects.create(
+                subject=f'ticket {i}', description='...', created_by=self.intern,
+                status='open' if i % 2 else 'closed', assigned_to=self.supervisor if i % 3 == 0 else None,
+            )
+            for i in range(60)
+        ]
+        SupportReply.objects.create(ticket=self.tickets[-1], responder=self.supervisor, message='a')
+        SupportReply.objects.create(ticket=self.tickets[-1], responder=self.supervisor, message='b')
+        self.client.force_login(self.supervisor)
+
+    def test_reaches_every_ticket_through_cursors(self):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(reverse('support_list'), {'cursor': cursor} if cursor else {})
+            page = response.context['cursor_page']
+            seen += [t.id for t in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted((t.id for t in self.tickets), reverse=True))
+
+    def test_filters_and_reply_annotations(self):
+        response = self.client.get(reverse('support_list'), {'status': 'open', 'assigned_to': 'none'})
+        tickets = list(response.context['tickets'])
+        self.assertTrue(tickets)
+        self.assertTrue(all(t.status == 'open' and t.assigned_to_id is None for t in tickets))
+        newest = self.client.get(reverse('support_list')).context['tickets'][0]
+        self.assertEqual((newest.reply_count, newest.last_reply_at is not None), (2, True))
+
+
+@override_settings(ASYNC_PARALLEL_QUERIES=False)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        cls.intern = CustomUser.objects.create_user('intern', role='intern')
+        Task.objects.create(title='Write report', assigned_to=cls.intern, created_by=cls.supervisor)
+        SupportTicket.objects.create(subject='Printer jam', description='...', created_by=cls.intern)
+
+    def request(self, factory, user, path='/', data=None):
+        request = factory.get(path, data)
+        request.user = user
+
+        async def auser():
+            return user
+        request.auser = auser
+        return request
+
+    async def test_async_views_show_what_sync_views_show(self):
+        for name, data, expected in [
+            ('dashboard', None, ['intern', 'Printer jam']),
+            ('support_ticket_list', {'status': 'open'}, ['Printer jam']),
+        ]:
+            response = await getattr(async_views, name)(self.request(AsyncRequestFactory(), self.supervisor, data=data))
+            self.assertEqual(response.status_code, 200)
+            for text in expected:
+                self.assertContains(response, text)
+
+        sync = await sync_to_async(views.tasks_time_series)(self.request(RequestFactory(), self.supervisor))
+        response = await async_views.tasks_time_series(self.request(AsyncRequestFactory(), self.supervisor))
+        self.assertEqual(response.content, sync.content)
+
+        response = await async_views.dashboard(self.request(AsyncRequestFactory(), self.intern))
+        self.assertContains(response, 'Write report')
+        response = await async_views.support_ticket_list(self.request(AsyncRequestFactory(), self.intern))
+        self.assertEqual(response.status_code, 403)
+
+
+class LiveEventTests(TestCase):
+    def setUp(self):
+        self.supervisor = CustomUser.objects.create_user('boss', role='supervisor')
+        self.intern = CustomUser.objects.create_user('intern', role='intern')
+        self.other = CustomUser.objects.create_user('other', role='intern')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.subscriptions = {
+            user: events.broker.subscribe(user.pk, user.role == 'supervisor', loop=self.loop)
+            for user in (self.supervisor, self.intern, self.other)
+        }
+        for subscription in self.subscriptions.values():
+            self.addCleanup(events.broker.unsubscribe, subscription)
+
+    def received(self, user):
+        # Run the deliveries scheduled from this thread
+        self.loop.run_until_complete(asyncio.sleep(0))
+        queue = self.subscriptions[user].queue
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    def test_saves_reach_supervisors_and_the_users_involved(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='Deploy', assigned_to=self.intern, created_by=self.supervisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            SupportTicket.objects.create(subject='VPN', description='...', created_by=self.other)
+
+        self.assertEqual([event.name for event in self.received(self.supervisor)], ['task', 'ticket'])
+        [event] = self.received(self.intern)
+        self.assertEqual((event.name, event.data['id'], event.data['status']), ('task', task.pk, 'todo'))
+        [event] = self.received(self.other)
+        self.assertEqual((event.name, event.data['open_tickets']), ('ticket', 1))
+        self.assertIn('event: ticket\n', event.encode())
+
+    def test_stream_sends_heartbeats_and_overflow_resyncs(self):
+        async def read(subscription, count):
+            stream = events.stream(subscription)
+            try:
+                return [await stream.__anext__() for _ in range(count)]
+            finally:
+                await stream.aclose()
+
+        subscription = self.subscriptions[self.intern]
+        with override_settings(SSE_HEARTBEAT_SECONDS=0.01):
+            retry, ping = self.loop.run_until_complete(read(subscription, 2))
+        self.assertTrue(retry.startswith('retry: '))
+        self.assertEqual(ping, ': ping\n\n')
+        # Closing the stream unsubscribes it
+        self.assertNotIn(subscription, events.broker._subscriptions)
+
+        with override_settings(SSE_QUEUE_SIZE=1):
+            subscription = events.broker.subscribe(self.supervisor.pk, supervisor=True, loop=self.loop)
+        self.addCleanup(events.broker.unsubscribe, subscription)
+        for n in range(3):
+            events.broker.publish(events.Event('tasks', {'count': n}))
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(subscription.dropped)
+        _, message = self.loop.run_until_complete(read(subscription, 2))
+        self.assertIn('event: resync', message)
+
+    def test_connection_cap_and_wsgi_fallback(self):
+        with override_settings(SSE_MAX_CONNECTIONS=len(events.broker)):
+            self.assertIsNone(events.broker.subscribe(self.intern.pk, loop=self.loop))
+        self.client.force_login(self.intern)
+        self.assertEqual(self.client.get(reverse('events')).status_code, 204)
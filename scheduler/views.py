@@ -8,92 +8,118 @@ from .forms import SupportTicketForm
 from .models import SupportTicket
 from .forms import SupportReplyForm
 from .models import SupportReply
-from django.core.mail import send_mail
-from django.conf import settings
 import logging
+from functools import partial
 logger = logging.getLogger(__name__)
 from django.contrib.auth.models import Group
-import csv
-from django.http import HttpResponse, JsonResponse
-from django.db.models import Count, Q
-from django.db.models.functions import TruncWeek
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from tasks.models import Task
-from django.core.exceptions import PermissionDenied
+from tasks.models import Task, WeeklyTaskRollup
+from tasks.bulk import bulk_reassign
+from tasks.imports import import_upload
+from tasks.pagination import InvalidCursor, KeysetPaginator
+from tasks.search import search_filter
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import UpdateView
 from django.views import View
 from django.contrib import messages
-from .forms import BulkReassignForm
+from .forms import BulkReassignForm, TaskImportForm
+from .caching import TEAM, cached, user_scope
+from .database import write_transaction
+from .replicas import reporting, reporting_alias
+from .metrics import render_prometheus
+from .outbox import enqueue_email
+from .stats import completion_rate, task_stats, team_summary, ticket_stats
+from .exports import (
+    TASK_HEADER, TASK_HISTORY_HEADER, TEAM_SUMMARY_HEADER,
+    filter_tasks, streaming_csv_response, task_rows, team_summary_rows,
+)
+
+# Support ticket list: newest first, 25 per page, totals counted up to 1,000
+TICKET_ORDERING = (('created_at', True), ('id', True))
+TICKETS_PER_PAGE = 25
+TICKET_COUNT_CAP = 1000
+
+
+def dashboard_user_queries(user, include_team=False):
+    """The independent queries behind a user's dashboard section, by context key."""
+    queries = {
+        # All task counters (own and team) come back from one aggregate query
+        'stats': partial(task_stats, user, include_team=include_team),
+        # The latest 5 tasks for the user, ordered by due date
+        'recent_tasks': lambda: list(Task.objects.filter(assigned_to=user).order_by('due_date')[:5]),
+    }
+    if user.role == 'intern':
+        # Only the latest reply time is shown, so annotate it instead of prefetching replies
+        queries['my_tickets'] = lambda: list(
+            SupportTicket.objects.filter(created_by=user).annotate(last_reply_at=Max('replies__created_at'))[:5]
+        )
+    return queries
+
+
+def dashboard_user_data(user, include_team=False):
+    """The user's own counters and latest tasks and tickets, plus the team counters for supervisors."""
+    return {name: query() for name, query in dashboard_user_queries(user, include_team).items()}
+
+
+def dashboard_team_queries():
+    """The independent queries behind the team section of a supervisor's dashboard, by context key."""
+    return {
+        'team_summary': lambda: list(team_summary()),
+        'groups_count': Group.objects.count,
+        # Recent support tickets for supervisors
+        'recent_tickets': lambda: list(
+            SupportTicket.objects.filter(status__in=['open', 'in_progress']).select_related('created_by')[:5]
+        ),
+        'open_tickets_count': lambda: ticket_stats()['open'],
+    }
+
+
+@reporting()
+def dashboard_team_data():
+    """Team-wide figures shown on every supervisor's dashboard, read from the replica if there is one."""
+    return {name: query() for name, query in dashboard_team_queries().items()}
+
+
+def supervisor_dashboard_context(context, stats, team):
+    """Add the team section to a supervisor's dashboard ``context``."""
+    team_overview = stats['team']
+    context.update(team)
+    context.update({
+        'team_overview': team_overview,
+        'interns_count': len(team['team_summary']),
+        'completion_rate': completion_rate(team_overview),
+    })
+    return context
 
 
 @login_required
 def dashboard(request):
     user = request.user
-    # Get the latest 5 tasks for the current user, ordered by due date
-    from django.utils import timezone
-    user_tasks = Task.objects.filter(assigned_to=user).order_by('due_date')[:5]
-    # Counts for the stats section
-    user_all_tasks_qs = Task.objects.filter(assigned_to=user)
-    tasks_assigned_count = user_all_tasks_qs.count()
-    tasks_completed_count = user_all_tasks_qs.filter(status='completed').count()
-    tasks_inprogress_count = user_all_tasks_qs.filter(status='in_progress').count()
+    is_supervisor = user.role == 'supervisor'
+    # Cached until a change bumps one of the scopes read; overdue counts can
+    # lag by up to DASHBOARD_CACHE_TIMEOUT since they move with the clock
+    scopes = [user_scope(user.pk)] + ([TEAM] if is_supervisor else [])
+    mine = cached(f'dashboard:user:{user.pk}', scopes, lambda: dashboard_user_data(user, is_supervisor))
+    stats = mine['stats']
 
     context = {
         'user': user,
-        'recent_tasks': user_tasks,
+        'recent_tasks': mine['recent_tasks'],
         'now': timezone.now(),
-        'tasks_assigned_count': tasks_assigned_count,
-        'tasks_completed_count': tasks_completed_count,
-        'tasks_inprogress_count': tasks_inprogress_count,
+        'tasks_assigned_count': stats['user']['total'],
+        'tasks_completed_count': stats['user']['completed'],
+        'tasks_inprogress_count': stats['user']['in_progress'],
     }
     
-    if user.role == 'supervisor':
-        interns = CustomUser.objects.filter(role='intern')
-        team_tasks = Task.objects.filter(assigned_to__in=interns)
-
-        summary = interns.annotate(
-            assigned_count=Count('assigned_tasks'),
-            completed_count=Count('assigned_tasks', filter=Q(assigned_tasks__status='completed')),
-            inprogress_count=Count('assigned_tasks', filter=Q(assigned_tasks__status='in_progress')),
-            overdue_count=Count('assigned_tasks', filter=Q(assigned_tasks__due_date__lt=timezone.now()))
-        )
-        context.update({
-            'team_summary': summary,
-            'team_overview': {
-                'total': team_tasks.count(),
-                'completed': team_tasks.filter(status='completed').count(),
-                'in_progress': team_tasks.filter(status='in_progress').count(),
-                'overdue': team_tasks.filter(due_date__lt=timezone.now()).count(),
-            }
-        })
-        # Supervisor-level aggregates
-        interns_count = interns.count()
-        from django.contrib.auth.models import Group
-        groups_count = Group.objects.count()
-        total_tasks = team_tasks.count()
-        completed = team_tasks.filter(status='completed').count()
-        completion_rate = round((completed / total_tasks) * 100, 1) if total_tasks else 0
-
-        context.update({
-            'interns_count': interns_count,
-            'groups_count': groups_count,
-            'completion_rate': completion_rate,
-        })
-        # Recent support tickets for supervisors
-        recent_tickets = SupportTicket.objects.filter(status__in=['open', 'in_progress']).select_related('created_by')[:5]
-        open_tickets_count = SupportTicket.objects.filter(status='open').count()
-        context.update({
-            'recent_tickets': recent_tickets,
-            'open_tickets_count': open_tickets_count,
-        })
+    if is_supervisor:
+        team = cached('dashboard:team', [TEAM], dashboard_team_data, reporting=True)
+        supervisor_dashboard_context(context, stats, team)
         return render(request, 'supervisor_dashboard.html', context)
     elif user.role == 'intern':
-        # Provide intern's own tickets to their dashboard
-        my_tickets = SupportTicket.objects.filter(created_by=user).select_related('assigned_to').prefetch_related('replies__responder')[:5]
-        context.update({
-            'my_tickets': my_tickets,
-        })
+        context['my_tickets'] = mine['my_tickets']
         return render(request, 'intern_dashboard.html', context)
     else:
         return render(request, 'unauthorized.html')
@@ -102,77 +128,36 @@ def dashboard(request):
 @login_required
 @supervisor_required
 def export_team_summary_csv(request):
-    """Export a CSV with per-intern task summary."""
-    interns = CustomUser.objects.filter(role='intern')
-    summary = interns.annotate(
-        assigned_count=Count('assigned_tasks'),
-        completed_count=Count('assigned_tasks', filter=Q(assigned_tasks__status='completed')),
-        inprogress_count=Count('assigned_tasks', filter=Q(assigned_tasks__status='in_progress')),
-        overdue_count=Count('assigned_tasks', filter=Q(assigned_tasks__due_date__lt=timezone.now()))
-    )
+    """Stream a CSV with per-intern task summary."""
+    # The rows are read after the view returns, so pick the database now
+    rows = team_summary_rows(using=reporting_alias())
+    return streaming_csv_response('team_summary.csv', TEAM_SUMMARY_HEADER, rows)
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="team_summary.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Intern ID', 'Username', 'Name', 'Assigned', 'In Progress', 'Completed', 'Overdue', 'Completion %'])
-
-    for intern in summary:
-        total = intern.assigned_count or 0
-        completed = intern.completed_count or 0
-        completion_pct = round((completed / total) * 100, 1) if total else 0
-        # get_full_name may not exist on custom user; guard
-        name = getattr(intern, 'get_full_name', None)
-        if callable(name):
-            display_name = intern.get_full_name() or intern.username
-        else:
-            display_name = getattr(intern, 'first_name', '') or intern.username
-
-        writer.writerow([
-            intern.id,
-            intern.username,
-            display_name,
-            total,
-            intern.inprogress_count or 0,
-            completed,
-            intern.overdue_count or 0,
-            completion_pct,
-        ])
-
-    return response
+
+@login_required
+@supervisor_required
+def export_tasks_csv(request):
+    """Stream every task as CSV, filtered by the query string.
+
+    Supports ``status``, ``priority``, ``assigned_to``, ``created_from`` and
+    ``created_to`` (YYYY-MM-DD); ``history=1`` adds history summary columns.
+    """
+    include_history = request.GET.get('history') == '1'
+    header = TASK_HEADER + (TASK_HISTORY_HEADER if include_history else [])
+    queryset = filter_tasks(Task.objects.all(), request.GET)
+    return streaming_csv_response('tasks.csv', header, task_rows(queryset, include_history=include_history))
 
 
 @login_required
 @supervisor_required
 def tasks_time_series(request):
-    """Return JSON series for tasks created and completed per week (last 12 weeks)."""
-    end = timezone.now()
-    start = end - timezone.timedelta(weeks=12)
-
-    created_qs = Task.objects.filter(created_at__gte=start)
-    created = created_qs.annotate(week=TruncWeek('created_at')).values('week').annotate(count=Count('id')).order_by('week')
-
-    completed_qs = Task.objects.filter(updated_at__gte=start, status='completed')
-    completed = completed_qs.annotate(week=TruncWeek('updated_at')).values('week').annotate(count=Count('id')).order_by('week')
-
-    data = {}
-    for row in created:
-        key = row['week'].date().isoformat()
-        data.setdefault(key, {})['created'] = row['count']
-    for row in completed:
-        key = row['week'].date().isoformat()
-        data.setdefault(key, {})['completed'] = row['count']
-
-    # ensure all weeks present
-    series = []
-    # Build list of weeks between start and end by week start
-    cur = start - timezone.timedelta(days=start.weekday())
-    while cur <= end:
-        key = cur.date().isoformat()
-        vals = data.get(key, {})
-        series.append({'week': key, 'created': vals.get('created', 0), 'completed': vals.get('completed', 0)})
-        cur = cur + timezone.timedelta(weeks=1)
+    """Return JSON series for tasks created and completed per week (last 12 weeks).
 
+    Reads the pre-aggregated ``WeeklyTaskRollup`` rows; completions are
+    bucketed by ``Task.completed_at``, so later edits no longer move them.
+    """
+    with reporting():
+        series = WeeklyTaskRollup.series(weeks=12)
     return JsonResponse(series, safe=False)
 
 
@@ -203,14 +188,9 @@ def signup_view(request):
 
 
 class SupervisorOrOwnerMixin:
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object() if hasattr(self, 'get_object') else None
-        if request.user.role == 'supervisor':
-            return super().dispatch(request, *args, **kwargs)
-        # Fallback: owner/assignee only
-        if obj and (obj.created_by == request.user or obj.assigned_to == request.user):
-            return super().dispatch(request, *args, **kwargs)
-        raise PermissionDenied
+    """Limit a task view to tasks the user may see; the view's own lookup then 404s for the rest."""
+    def get_queryset(self):
+        return Task.objects.visible_to(self.request.user)
 
 
 class TaskUpdateView(LoginRequiredMixin, SupervisorOrOwnerMixin, UpdateView):
@@ -224,31 +204,60 @@ class BulkReassignView(LoginRequiredMixin, View):
     def post(self, request):
         form = BulkReassignForm(request.POST)
         if form.is_valid():
-            task_ids = form.cleaned_data['task_ids']  # list of ids
+            task_ids = [t.id for t in form.cleaned_data['task_ids']]
             new_user = form.cleaned_data['assigned_to']
-            # Iterate and save each task so history and save logic run
-            qs = Task.objects.filter(id__in=[t.id for t in task_ids])
-            for task in qs:
-                task.assigned_to = new_user
-                task.delegated_by = request.user
-                task._current_user = request.user
-                task.save()
-            messages.success(request, 'Tasks reassigned.')
+            # Set-based update; writes history and counters per chunk
+            changed = bulk_reassign(task_ids, new_user, actor=request.user)
+            messages.success(request, f'{changed} task(s) reassigned.')
             return redirect('tasks:task_list')
         return render(request, 'tasks/bulk_reassign.html', {'form': form})
 
 
+class TaskImportView(LoginRequiredMixin, View):
+    """Supervisor upload for ``tasks.imports``; rejected rows are listed, the rest are created."""
+    # Rejected rows shown on the result page
+    max_errors_shown = 100
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and request.user.role != 'supervisor':
+            return HttpResponseForbidden("Only supervisors can access this page.")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request):
+        return render(request, 'tasks/import_tasks.html', {'form': TaskImportForm()})
+
+    def post(self, request):
+        form = TaskImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return render(request, 'tasks/import_tasks.html', {'form': form})
+        result = import_upload(form.cleaned_data['file'], actor=request.user)
+        if result.created:
+            messages.success(request, f'{result.created} task(s) imported.')
+        return render(request, 'tasks/import_tasks.html', {
+            'form': TaskImportForm(),
+            'result': result,
+            'errors': result.errors[:self.max_errors_shown],
+        })
+
+
 @login_required
 @supervisor_required
 def approve_task(request, pk):
-    task = get_object_or_404(Task, pk=pk)
+    task = get_object_or_404(Task.objects.visible_to(request.user), pk=pk)
     task.approved = True
-    task.current_user = request.user
+    task._current_user = request.user
     task.save()
     messages.success(request, 'Task approved.')
     return redirect('tasks:task_list')
 
 
+@login_required
+@supervisor_required
+def metrics_view(request):
+    """Expose this worker's request metrics in the Prometheus text format."""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required
 @supervisor_required
 def reports_page(request):
@@ -275,12 +284,76 @@ def support_ticket_create(request):
     return render(request, 'support/create_ticket.html', {'form': form})
 
 
+def filter_tickets(queryset, params):
+    """Apply the ticket list filters in ``params`` (``status``, ``priority``, ``assigned_to``, ``q``)."""
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+    priority = params.get('priority')
+    if priority:
+        queryset = queryset.filter(priority=priority)
+    assigned_to = params.get('assigned_to')
+    if assigned_to == 'none':
+        queryset = queryset.filter(assigned_to__isnull=True)
+    elif assigned_to:
+        try:
+            queryset = queryset.filter(assigned_to_id=int(assigned_to))
+        except ValueError:
+            queryset = queryset.none()
+    query = params.get('q', '').strip()
+    if query:
+        queryset = search_filter(queryset, query)
+    return queryset
+
+
+def ticket_list_queries(params, cursor=None):
+    """The independent queries behind the support ticket list, by context key.
+
+    ``page`` raises ``Http404`` for an invalid ``cursor``.
+    """
+    replies = SupportReply.objects.filter(ticket=OuterRef('pk')).order_by()
+    tickets = filter_tickets(SupportTicket.objects.select_related('created_by', 'assigned_to'), params).annotate(
+        reply_count=Coalesce(Subquery(replies.values('ticket').annotate(n=Count('id')).values('n')), 0),
+        last_reply_at=Subquery(replies.order_by('-created_at').values('created_at')[:1]),
+    )
+    paginator = KeysetPaginator(tickets, TICKET_ORDERING, TICKETS_PER_PAGE, count_cap=TICKET_COUNT_CAP)
+
+    def page():
+        try:
+            return paginator.page(cursor)
+        except InvalidCursor:
+            raise Http404('Invalid cursor.')
+
+    return {
+        'cursor_page': page,
+        'supervisors': lambda: list(CustomUser.objects.filter(role='supervisor').order_by('username')),
+    }
+
+
+def ticket_list_context(params, results):
+    """Template context for the ticket list from the results of ``ticket_list_queries``."""
+    query = params.copy()
+    query.pop('cursor', None)
+    return {
+        'tickets': results['cursor_page'].object_list,
+        'filter_query': query.urlencode(),
+        'status_choices': SupportTicket.STATUS_CHOICES,
+        'priority_choices': SupportTicket.PRIORITY_CHOICES,
+        **results,
+    }
+
+
 @login_required
 @supervisor_required
 def support_ticket_list(request):
-    """Supervisor view: list recent tickets."""
-    tickets = SupportTicket.objects.all().select_related('created_by', 'assigned_to')[:50]
-    return render(request, 'support/ticket_list.html', {'tickets': tickets})
+    """Supervisor view: filterable ticket list, newest first, paginated by cursor.
+
+    Reply count and last reply time come from correlated subqueries, which
+    SQLite evaluates only for the rows on the current page.
+    """
+    queries = ticket_list_queries(request.GET, request.GET.get('cursor'))
+    results = {name: query() for name, query in queries.items()}
+    return render(request, 'support/ticket_list.html', ticket_list_context(request.GET, results))
 
 
 @login_required
@@ -309,25 +382,22 @@ def support_ticket_detail(request, pk):
             return HttpResponseForbidden("Only supervisors can post replies.")
         form = SupportReplyForm(request.POST)
         if form.is_valid():
-            reply = form.save(commit=False)
-            reply.ticket = ticket
-            reply.responder = request.user
-            reply.save()
-
-            # Send email notification to ticket owner if they have an email
-            recipient_email = getattr(ticket.created_by, 'email', None)
-            if recipient_email:
-                subject = f"Response to your support ticket #{ticket.id}: {ticket.subject}"
-                body = (
-                    f"Hello {ticket.created_by.get_full_name() or ticket.created_by.username},\n\n"
-                    f"A supervisor has replied to your support ticket:\n\n{reply.message}\n\n"
-                    "--\nDincharya Support Team"
-                )
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
-                try:
-                    send_mail(subject, body, from_email, [recipient_email], fail_silently=True)
-                except Exception:
-                    logger.exception('Failed to send support reply email for ticket %s', ticket.pk)
+            with write_transaction():
+                reply = form.save(commit=False)
+                reply.ticket = ticket
+                reply.responder = request.user
+                reply.save()
+
+                # Queue an email to the ticket owner; the send_outbox worker delivers it
+                recipient_email = getattr(ticket.created_by, 'email', None)
+                if recipient_email:
+                    subject = f"Response to your support ticket #{ticket.id}: {ticket.subject}"
+                    body = (
+                        f"Hello {ticket.created_by.get_full_name() or ticket.created_by.username},\n\n"
+                        f"A supervisor has replied to your support ticket:\n\n{reply.message}\n\n"
+                        "--\nDincharya Support Team"
+                    )
+                    enqueue_email(subject, body, [recipient_email])
 
             messages.success(request, 'Reply posted and intern notified.')
             return redirect('support_detail', pk=ticket.pk)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from .models import Task, TaskHistory
+from .pagination import CappedCountPaginator
+from .search import search_filter
 
 User = get_user_model()
 
@@ -8,10 +10,28 @@ User = get_user_model()
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_by', 'assigned_to', 'priority', 'status', 'due_date', 'created_at')
     list_filter = ('priority', 'status', 'created_at')
-    list_display = ('title', 'created_by', 'assigned_to', 'priority', 'status', 'approved', 'due_date', 'created_at')
+    list_display = ('title', 'created_by', 'assigned_to', 'priority_level', 'status', 'approved', 'due_date', 'created_at')
     search_fields = ('title', 'description', 'created_by__username', 'assigned_to__username')
     readonly_fields = ('created_by', 'delegated_by', 'created_at', 'updated_at')
+    autocomplete_fields = ('assigned_to',)
+    list_select_related = ('created_by', 'assigned_to')
+    # Same order as the task list, served by task_due_priority_idx, which
+    # also serves the date drill-down
+    ordering = ('due_date', '-priority_rank', 'id')
+    date_hierarchy = 'due_date'
+    paginator = CappedCountPaginator
+    show_full_result_count = False
     # Allow admins to approve tasks from admin UI if needed
+
+    @admin.display(description='Priority', ordering='priority_rank')
+    def priority_level(self, obj):
+        return obj.get_priority_display()
+
+    def get_search_results(self, request, queryset, search_term):
+        # search_fields above only label the search box; matching uses the full-text index
+        if not search_term.strip():
+            return queryset, False
+        return search_filter(queryset, search_term), False
     
     def save_model(self, request, obj, form, change):
         if not obj.created_by_id:
@@ -24,3 +44,16 @@ class TaskHistoryAdmin(admin.ModelAdmin):
     list_display = ('task', 'action', 'actor', 'timestamp')
     list_filter = ('action', 'timestamp')
     search_fields = ('task__title', 'actor__username')
+    autocomplete_fields = ('task', 'actor')
+    list_select_related = ('task', 'actor')
+    # Newest first along taskhistory_time_idx, which also serves the drill-down
+    ordering = ('-timestamp', '-id')
+    date_hierarchy = 'timestamp'
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # History is found through its task's search document
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(task__in=search_filter(Task.objects.all(), search_term).values('pk')), False
@@ -0,0 +1,203 @@
+"""Read-only JSON API over the task list.
+
+Rows are serialized straight from ``.values()``; no model instances are
+built. Every response carries an ETag and Last-Modified derived from the
+scoped set's ``max(updated_at)`` and row count, so an unchanged poll is
+answered with 304 after one aggregate query and no serialization.
+
+``task_changes_json`` serves the incremental change feed (see ``changes``)
+so clients that keep a local copy only fetch what changed since their
+cursor.
+"""
+import hashlib
+
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET
+
+from .archive import timeline
+from .changes import ChangeCursor, CursorExpired, InvalidChangeCursor, head_cursor, read_changes
+from .models import Task
+from .pagination import InvalidCursor, KeysetPaginator
+from .views import TaskListView, list_scope
+
+# Public field name -> ORM lookup passed to .values()
+API_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'priority': 'priority',
+    'priority_rank': 'priority_rank',
+    'due_date': 'due_date',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'completed_at': 'completed_at',
+    'requires_approval': 'requires_approval',
+    'approved': 'approved',
+    'assigned_to': 'assigned_to_id',
+    'assigned_to_username': 'assigned_to__username',
+    'created_by': 'created_by_id',
+    'delegated_by': 'delegated_by_id',
+}
+DEFAULT_FIELDS = ('id', 'title', 'status', 'priority', 'due_date', 'assigned_to', 'updated_at')
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def parse_fields(raw):
+    """Return the requested public field names, or raise ``ValueError`` naming unknown ones."""
+    if not raw:
+        return list(DEFAULT_FIELDS)
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in API_FIELDS]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return fields
+
+
+def parse_limit(raw):
+    """Clamp ``raw`` to ``1..MAX_LIMIT``; raises ``ValueError`` when it is not an integer."""
+    return min(MAX_LIMIT, max(1, int(raw if raw is not None else DEFAULT_LIMIT)))
+
+
+def list_watchers(request):
+    """Assignee ids ``list_scope(request)`` draws from, or None when it spans every task."""
+    user = request.user
+    assigned_user = request.GET.get('assigned_to')
+    if assigned_user and (user.is_superuser or getattr(user, 'role', None) == 'supervisor'):
+        try:
+            return {int(assigned_user)}
+        except (ValueError, TypeError):
+            return set()
+    if user.is_superuser and 'assigned_to_me' not in request.GET:
+        return None
+    return {user.pk}
+
+
+def validators_for(queryset, request):
+    """``(etag, last_modified)`` for the scoped set, from one aggregate query.
+
+    The full path is mixed into the ETag so different pages, fields or
+    filters never share a validator.
+    """
+    stamp = queryset.aggregate(last=Max('updated_at'), rows=Count('id'))
+    last_modified = stamp['last'].timestamp() if stamp['last'] else None
+    digest = hashlib.sha1(f"{stamp['last']}|{stamp['rows']}|{request.get_full_path()}".encode()).hexdigest()
+    return quote_etag(digest), last_modified
+
+
+@login_required
+@require_GET
+def task_list_json(request):
+    """Tasks visible to the user as JSON, with sparse fields and cursor pagination.
+
+    Query parameters: the task list's filters (``status``, ``assigned_to``,
+    ``assigned_to_me``), ``fields`` (comma separated), ``limit`` and
+    ``cursor``.
+    """
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ValueError as exc:
+        return JsonResponse({'error': f'Unknown fields: {exc}', 'allowed': sorted(API_FIELDS)}, status=400)
+    try:
+        limit = parse_limit(request.GET.get('limit'))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+
+    scoped = list_scope(request)
+    etag, last_modified = validators_for(scoped, request)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    # The ordering columns are always selected so the cursor can be built
+    ordering = TaskListView.keyset_ordering
+    lookups = list(dict.fromkeys([API_FIELDS[name] for name in fields] + [key for key, _ in ordering]))
+    paginator = KeysetPaginator(scoped.values(*lookups), ordering, limit)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    response = JsonResponse({
+        'results': [{name: row[API_FIELDS[name]] for name in fields} for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }, encoder=DjangoJSONEncoder)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@login_required
+@require_GET
+def task_changes_json(request):
+    """Tasks changed since ``cursor``, as upserts, removals and new history entries.
+
+    Takes the task list's filters, ``fields``, ``limit`` and ``cursor``.
+    Without a cursor the feed starts at the beginning of the log;
+    ``cursor=latest`` returns no changes and a cursor at the current end,
+    for clients that just loaded the full list. A cursor older than the
+    history retention window gets 410 and the client must resync.
+    """
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ValueError as exc:
+        return JsonResponse({'error': f'Unknown fields: {exc}', 'allowed': sorted(API_FIELDS)}, status=400)
+    try:
+        limit = parse_limit(request.GET.get('limit'))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+
+    token = request.GET.get('cursor')
+    if token == 'latest':
+        return JsonResponse({
+            'tasks': [], 'removed': [], 'history': [], 'next': head_cursor().encode(), 'has_more': False,
+        })
+    try:
+        cursor = ChangeCursor.decode(token) if token else ChangeCursor()
+        page = read_changes(
+            list_scope(request), list_watchers(request), cursor, limit,
+            fields=[API_FIELDS[name] for name in fields],
+        )
+    except InvalidChangeCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+    except CursorExpired:
+        return JsonResponse({'error': 'Cursor expired; reload the task list and start over.'}, status=410)
+
+    return JsonResponse({
+        'tasks': [{name: row[API_FIELDS[name]] for name in fields} for row in page.tasks],
+        'removed': page.removed,
+        'history': page.history,
+        'next': page.cursor.encode(),
+        'has_more': page.has_more,
+    }, encoder=DjangoJSONEncoder)
+
+
+@login_required
+@require_GET
+def task_history_json(request, pk):
+    """One task's full history, merging live and archived entries, oldest first."""
+    task = get_object_or_404(Task.objects.visible_to(request.user), pk=pk)
+    return JsonResponse({
+        'task': task.pk,
+        'results': [
+            {
+                'id': entry.id,
+                'action': entry.action,
+                'actor': entry.actor_id,
+                'old_value': entry.old_value,
+                'new_value': entry.new_value,
+                'timestamp': entry.timestamp,
+                'archived': entry.archived,
+            }
+            for entry in timeline(task.pk)
+        ],
+    }, encoder=DjangoJSONEncoder)
@@ -0,0 +1,124 @@
+"""TaskHistory retention.
+
+``archive_history`` moves entries older than the retention window out of
+``TaskHistory`` into ``TaskHistoryArchive``: one gzipped JSON-lines blob per
+task and calendar month. Work is done in batches of oldest rows, each in its
+own short transaction, so the write lock is never held for longer than one
+batch takes. ``timeline`` reads a task's hot and archived entries back as
+one list.
+"""
+import gzip
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from scheduler.database import write_transaction
+
+from .models import TaskHistory, TaskHistoryArchive
+
+DEFAULT_RETENTION_DAYS = 180
+DEFAULT_BATCH_SIZE = 500
+
+ENTRY_FIELDS = ('id', 'actor_id', 'action', 'old_value', 'new_value', 'timestamp')
+
+
+def retention_cutoff(days=None, now=None):
+    """Entries recorded before this moment are due for archiving."""
+    if days is None:
+        days = getattr(settings, 'TASK_HISTORY_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def pack(entries):
+    """Gzip ``entries`` (dicts with ``ENTRY_FIELDS``) as JSON lines."""
+    lines = '\n'.join(
+        json.dumps({**entry, 'timestamp': entry['timestamp'].isoformat()}, separators=(',', ':'))
+        for entry in entries
+    )
+    return gzip.compress(lines.encode(), compresslevel=6)
+
+
+def unpack(data):
+    entries = []
+    for line in gzip.decompress(bytes(data)).decode().splitlines():
+        entry = json.loads(line)
+        entry['timestamp'] = parse_datetime(entry['timestamp'])
+        entries.append(entry)
+    return entries
+
+
+@dataclass
+class ArchiveResult:
+    archived: int = 0
+    batches: int = 0
+
+
+def archive_history(before, batch_size=DEFAULT_BATCH_SIZE, max_batches=None, pause=0, dry_run=False):
+    """Move ``TaskHistory`` rows recorded before ``before`` into the archive.
+
+    Each batch selects the oldest ``batch_size`` rows along
+    ``taskhistory_time_idx``, writes their archive rows and deletes them in
+    one transaction. ``pause`` seconds between batches leave room for other
+    writers; ``max_batches`` bounds a single run.
+    """
+    result = ArchiveResult()
+    due = TaskHistory.objects.filter(timestamp__lt=before)
+    if dry_run:
+        result.archived = due.count()
+        return result
+
+    while max_batches is None or result.batches < max_batches:
+        with write_transaction():
+            rows = list(due.order_by('timestamp', 'id').values('task_id', *ENTRY_FIELDS)[:batch_size])
+            if not rows:
+                break
+            groups = defaultdict(list)
+            for row in rows:
+                stamp = timezone.localtime(row['timestamp'])
+                groups[(row.pop('task_id'), stamp.date().replace(day=1))].append(row)
+            TaskHistoryArchive.objects.bulk_create([
+                TaskHistoryArchive(
+                    task_id=task_id,
+                    period=period,
+                    entry_count=len(entries),
+                    first_timestamp=entries[0]['timestamp'],
+                    last_timestamp=entries[-1]['timestamp'],
+                    data=pack(entries),
+                )
+                for (task_id, period), entries in groups.items()
+            ])
+            # TaskHistory has no delete receivers or dependent rows, so this
+            # is a single DELETE without loading the rows
+            TaskHistory.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        result.archived += len(rows)
+        result.batches += 1
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return result
+
+
+def timeline(task_id):
+    """Every history entry of one task, hot and archived, oldest first.
+
+    Archived entries come back as unsaved ``TaskHistory`` instances with
+    ``archived`` set, so callers can treat both kinds alike.
+    """
+    entries = []
+    for archive in TaskHistoryArchive.objects.filter(task_id=task_id).order_by('period', 'id'):
+        for entry in unpack(archive.data):
+            item = TaskHistory(task_id=task_id, **entry)
+            item.archived = True
+            entries.append(item)
+    for item in TaskHistory.objects.filter(task_id=task_id).order_by('timestamp', 'id'):
+        item.archived = False
+        entries.append(item)
+    entries.sort(key=lambda item: (item.timestamp, item.id))
+    return entries
@@ -0,0 +1,111 @@
+"""Set-based operations over many tasks.
+
+These bypass ``Task.save`` for speed, so each one writes the matching
+``TaskHistory`` rows, ``TaskCounter`` deltas, change feed entries and search
+documents itself, inside the same transaction as the UPDATE, invalidates the
+dashboard cache and announces the change to live update subscribers.
+"""
+from collections import Counter
+
+from django.utils import timezone
+
+from scheduler.caching import TEAM, bump_on_change, user_scope
+from scheduler.database import write_transaction
+from scheduler.events import tasks_changed
+
+from .models import Task, TaskChange, TaskCounter, TaskHistory, WeeklyTaskRollup, week_start
+from .search import get_backend
+
+# Keeps every ``id IN (...)`` well under SQLite's bound-parameter limit
+DEFAULT_CHUNK_SIZE = 500
+
+
+def chunked(items, size):
+    """Yield successive lists of at most ``size`` items."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_reassign(task_ids, new_user, actor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Assign the given tasks to ``new_user`` and return how many changed.
+
+    Each chunk costs one SELECT of the current assignees, one
+    ``UPDATE ... WHERE id IN (...)``, one batched history insert and the
+    counter updates, all in a single transaction. Tasks already assigned to
+    ``new_user`` are left untouched.
+    """
+    changed = 0
+    for chunk in chunked(task_ids, chunk_size):
+        with write_transaction():
+            rows = list(
+                Task.objects.select_for_update()
+                .filter(id__in=chunk)
+                .exclude(assigned_to=new_user)
+                .values_list('id', 'assigned_to_id', 'status')
+            )
+            if not rows:
+                continue
+            ids = [task_id for task_id, _, _ in rows]
+            Task.objects.filter(id__in=ids).update(
+                assigned_to=new_user,
+                delegated_by=actor,
+                updated_at=timezone.now(),
+            )
+            TaskHistory.objects.bulk_create([
+                TaskHistory(
+                    task_id=task_id,
+                    actor=actor,
+                    action='assigned_changed',
+                    old_value=str(old_assignee),
+                    new_value=str(new_user.pk),
+                )
+                for task_id, old_assignee, _ in rows
+            ])
+            deltas = Counter()
+            for _, old_assignee, status in rows:
+                deltas[(old_assignee, status)] -= 1
+                deltas[(new_user.pk, status)] += 1
+            TaskCounter.apply_deltas(deltas)
+            TaskChange.record((task_id, new_user.pk, old_assignee) for task_id, old_assignee, _ in rows)
+            # The assignee's username is part of each task's search document
+            get_backend().index_queryset(Task.objects.filter(id__in=ids))
+            affected = {old_assignee for _, old_assignee, _ in rows if old_assignee} | {new_user.pk}
+            bump_on_change(TEAM, *(user_scope(user_id) for user_id in affected))
+            tasks_changed(affected, len(ids))
+            changed += len(ids)
+    return changed
+
+
+def bulk_create_tasks(tasks, actor=None):
+    """Insert the unsaved ``tasks`` and return them with their primary keys set.
+
+    One multi-row INSERT for the tasks and one for their ``created`` history
+    entries, plus the counter, rollup, search and cache updates that
+    ``Task.save`` would have made, all in one transaction.
+    """
+    if not tasks:
+        return []
+    now = timezone.now()
+    for task in tasks:
+        task.priority_rank = Task.PRIORITY_RANKS.get(task.priority, 0)
+        task.completed_at = now if task.status == 'completed' else None
+    with write_transaction():
+        created = Task.objects.bulk_create(tasks)
+        TaskHistory.objects.bulk_create([
+            TaskHistory(task=task, actor=actor, action='created', old_value='', new_value=task.title)
+            for task in created
+        ])
+        TaskCounter.apply_deltas(Counter((task.assigned_to_id, task.status) for task in created))
+        rollup = Counter()
+        for task in created:
+            rollup[(week_start(task.created_at), 'created_count')] += 1
+            if task.completed_at:
+                rollup[(week_start(task.completed_at), 'completed_count')] += 1
+        WeeklyTaskRollup.apply_deltas(rollup)
+        TaskChange.record((task.pk, task.assigned_to_id, None) for task in created)
+        get_backend().index_queryset(Task.objects.filter(id__in=[task.pk for task in created]))
+        assignees = {task.assigned_to_id for task in created if task.assigned_to_id}
+        bump_on_change(TEAM, *(user_scope(user_id) for user_id in assignees))
+        tasks_changed(assignees, len(created))
+    return created
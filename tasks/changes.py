@@ -0,0 +1,163 @@
+"""Incremental change feed over tasks and their history.
+
+A cursor marks how far a client has read two append-only logs:
+``TaskChange`` (task writes and delete tombstones) and ``TaskHistory``. Each
+page reads both in id order from there and returns
+
+* ``tasks``: the current state of tasks written since the cursor that are
+  in the caller's scope;
+* ``removed``: tasks the caller may hold that were deleted or have left its
+  scope (for example by being reassigned);
+* ``history``: new history entries of tasks in scope;
+
+plus the cursor to continue from. A client that stores the cursor syncs in
+O(changes) instead of refetching every task. A feed read without a cursor
+starts at the beginning of the log, which lists every task once.
+
+``prune_changes`` compacts the log to the latest row per task once rows
+pass the history retention window. Cursors issued before that window, or
+before the cutoff of the latest prune when it was run with a shorter one,
+are rejected with ``CursorExpired`` and the client must sync from scratch.
+"""
+import base64
+import binascii
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from scheduler.database import write_transaction
+
+from .archive import retention_cutoff
+from .models import TaskChange, TaskChangePrune, TaskHistory
+
+HISTORY_FIELDS = ('id', 'task_id', 'actor_id', 'action', 'old_value', 'new_value', 'timestamp')
+
+
+class InvalidChangeCursor(ValueError):
+    pass
+
+
+class CursorExpired(Exception):
+    """The cursor predates the retained log; the client has to sync from scratch."""
+
+
+@dataclass(frozen=True)
+class ChangeCursor:
+    change_id: int = 0
+    history_id: int = 0
+    # When the cursor was handed out; None for the start of the log
+    issued_at: object = None
+
+    def encode(self):
+        payload = json.dumps(
+            {'c': self.change_id, 'h': self.history_id, 't': self.issued_at.isoformat() if self.issued_at else None},
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, token):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode((token + '=' * (-len(token) % 4)).encode()))
+            issued_at = parse_datetime(payload['t']) if payload['t'] else None
+            cursor = cls(int(payload['c']), int(payload['h']), issued_at)
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise InvalidChangeCursor(token)
+        if cursor.change_id < 0 or cursor.history_id < 0:
+            raise InvalidChangeCursor(token)
+        return cursor
+
+
+def head_cursor():
+    """A cursor at the current end of both logs, for clients that fetched the full list just before."""
+    last_change = TaskChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    last_history = TaskHistory.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    return ChangeCursor(last_change, last_history, timezone.now())
+
+
+@dataclass
+class ChangePage:
+    tasks: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    history: list = field(default_factory=list)
+    cursor: ChangeCursor = None
+    has_more: bool = False
+
+
+def expiry_cutoff():
+    """Cursors issued before this moment may have missed pruned rows."""
+    pruned_before = TaskChangePrune.objects.aggregate(before=Max('before'))['before']
+    cutoff = retention_cutoff()
+    return max(cutoff, pruned_before) if pruned_before else cutoff
+
+
+def read_changes(scope, watchers, cursor, limit, fields=('id',)):
+    """Up to ``limit`` task changes and ``limit`` history entries after ``cursor``.
+
+    ``scope`` is the queryset of tasks the caller may see. ``watchers`` is
+    the set of assignee ids that scope is drawn from (None for every task);
+    only log rows involving one of them are read, so a page costs O(the
+    caller's changes). Rows outside ``scope`` still move the cursor on, so a
+    page can hold fewer than ``limit`` entries while ``has_more`` is set.
+    ``fields`` are the ``.values()`` lookups returned for each task.
+    """
+    if cursor.issued_at is not None and cursor.issued_at < expiry_cutoff():
+        raise CursorExpired()
+
+    changes = TaskChange.objects.filter(id__gt=cursor.change_id)
+    history = TaskHistory.objects.filter(id__gt=cursor.history_id)
+    if watchers is not None:
+        changes = changes.filter(Q(assigned_to_id__in=watchers) | Q(previous_assigned_to_id__in=watchers))
+        history = history.filter(task__assigned_to_id__in=watchers)
+    changes = list(changes.order_by('id').values_list('id', 'task_id', 'deleted')[:limit + 1])
+    history = list(history.order_by('id').values(*HISTORY_FIELDS)[:limit + 1])
+    page = ChangePage(has_more=len(changes) > limit or len(history) > limit)
+    changes, history = changes[:limit], history[:limit]
+
+    # The last row per task decides whether it was deleted
+    deleted = {task_id: was_deleted for _, task_id, was_deleted in changes}
+    # One lookup checks the scope for changed tasks and history entries alike
+    wanted = set(deleted) | {row['task_id'] for row in history}
+    current = {row['id']: row for row in scope.filter(id__in=wanted).values(*dict.fromkeys(('id', *fields)))} if wanted else {}
+    for task_id, was_deleted in deleted.items():
+        if task_id in current and not was_deleted:
+            page.tasks.append(current[task_id])
+        else:
+            page.removed.append({'id': task_id, 'deleted': was_deleted})
+    page.history = [row for row in history if row['task_id'] in current]
+    page.cursor = ChangeCursor(
+        changes[-1][0] if changes else cursor.change_id,
+        history[-1]['id'] if history else cursor.history_id,
+        timezone.now(),
+    )
+    return page
+
+
+def prune_changes(before, batch_size=500, pause=0):
+    """Drop ``TaskChange`` rows from before ``before`` that a later row supersedes, and old tombstones.
+
+    Every live task keeps at least its latest row, so a feed read from the
+    start still lists it. ``before`` is recorded first, so cursors issued
+    before it expire even when it is later than the retention window.
+    Returns the number of rows removed.
+    """
+    TaskChangePrune.objects.create(before=before)
+    superseded = TaskChange.objects.filter(task_id=OuterRef('task_id'), id__gt=OuterRef('id'))
+    due = TaskChange.objects.filter(changed_at__lt=before).filter(Q(deleted=True) | Exists(superseded))
+    removed = 0
+    while True:
+        with write_transaction():
+            ids = list(due.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            TaskChange.objects.filter(id__in=ids).delete()
+        removed += len(ids)
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return removed
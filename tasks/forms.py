@@ -38,6 +38,15 @@ class TaskForm(forms.ModelForm):
             self.initial['status'] = 'todo'
             self.initial['priority'] = 'medium'
 
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        # Edits follow the same state machine as the status links
+        if self.instance.pk and status != self.instance.status and status not in self.instance.next_statuses:
+            raise forms.ValidationError(
+                f'A {self.instance.get_status_display()} task cannot move to {dict(Task.STATUS_CHOICES)[status]}.'
+            )
+        return status
+
     def clean(self):
         cleaned_data = super().clean()
         assigned_to = cleaned_data.get('assigned_to')
@@ -0,0 +1,219 @@
+"""Bulk task import from CSV or JSON lines.
+
+Input is parsed as a stream and handled in chunks of ``chunk_size`` rows:
+each chunk resolves its assignee usernames with one query (names already
+seen are remembered for the rest of the import), validates every row, and
+inserts the valid ones with ``bulk_create_tasks``. Invalid rows are reported
+by line number and skipped; they never abort the rest of their chunk.
+
+Earlier chunks are committed by the time later lines are read, so a file is
+decoded line by line (``Utf8Lines``): a line that is not valid UTF-8 rejects
+only the row it belongs to instead of failing the import half way through.
+"""
+import codecs
+import csv
+import datetime
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .bulk import DEFAULT_CHUNK_SIZE, bulk_create_tasks
+from .models import Task
+
+User = get_user_model()
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_COLUMNS = ('title', 'description', 'assigned_to', 'priority', 'status', 'due_date', 'requires_approval')
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n'}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    # (line number, message) for every rejected row
+    errors: list = field(default_factory=list)
+
+
+def format_for(filename):
+    """Guess the import format from a file name; CSV unless it ends in .jsonl or .ndjson."""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+class Utf8Lines:
+    """Text lines of the binary ``stream``, each decoded as UTF-8 on its own.
+
+    A line that does not decode is yielded with replacement characters so
+    parsing can go on, and its number is added to ``bad_lines``.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bad_lines = set()
+
+    def __iter__(self):
+        for line_number, raw in enumerate(self.stream, start=1):
+            if line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+                raw = raw[len(codecs.BOM_UTF8):]
+            try:
+                yield raw.decode('utf-8')
+            except UnicodeDecodeError:
+                self.bad_lines.add(line_number)
+                yield raw.decode('utf-8', 'replace')
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row, error)`` for each record in the text ``stream``.
+
+    Rows touching one of the ``bad_lines`` of a ``Utf8Lines`` stream are
+    reported as errors.
+    """
+    bad_lines = getattr(stream, 'bad_lines', set())
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        first_line = 2
+        for row in reader:
+            # A quoted cell may span lines; reject the row if any of them is bad
+            if any(line in bad_lines for line in range(first_line, reader.line_num + 1)):
+                yield reader.line_num, None, 'not valid UTF-8'
+            else:
+                # Extra cells beyond the header land under the None key
+                row.pop(None, None)
+                yield reader.line_num, row, None
+            first_line = reader.line_num + 1
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if line_number in bad_lines:
+            yield line_number, None, 'not valid UTF-8'
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f'invalid JSON: {exc}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'each line must be a JSON object'
+            continue
+        yield line_number, row, None
+
+
+class UsernameLookup:
+    """Username to user id, filled with one query per batch of new names."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def load(self, usernames):
+        missing = {name for name in usernames if name and name not in self.ids}
+        if not missing:
+            return
+        found = dict(User.objects.filter(username__in=missing, is_active=True).values_list('username', 'id'))
+        for name in missing:
+            self.ids[name] = found.get(name)
+
+    def get(self, username):
+        return self.ids.get(username)
+
+
+def _text(row, name):
+    value = row.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def _choice(row, name, choices, default):
+    value = _text(row, name) or default
+    if value not in dict(choices):
+        raise ImportRowError(f'{name} must be one of {", ".join(dict(choices))}, got "{value}"')
+    return value
+
+
+def _due_date(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ImportRowError(f'due_date "{value}" is not an ISO date or datetime')
+        parsed = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def build_task(row, users, actor=None):
+    """An unsaved ``Task`` for ``row``, or ``ImportRowError`` explaining why not."""
+    title = _text(row, 'title')
+    if not title:
+        raise ImportRowError('title is required')
+    max_title = Task._meta.get_field('title').max_length
+    if len(title) > max_title:
+        raise ImportRowError(f'title is longer than {max_title} characters')
+
+    assigned_to = None
+    username = _text(row, 'assigned_to')
+    if username:
+        assigned_to = users.get(username)
+        if assigned_to is None:
+            raise ImportRowError(f'unknown or inactive user "{username}"')
+
+    requires_approval = _text(row, 'requires_approval').lower()
+    if requires_approval not in TRUE_VALUES | FALSE_VALUES:
+        raise ImportRowError(f'requires_approval must be true or false, got "{requires_approval}"')
+    try:
+        due_date = _due_date(_text(row, 'due_date'))
+    except ValueError as exc:
+        raise ImportRowError(str(exc))
+
+    return Task(
+        title=title,
+        description=_text(row, 'description'),
+        assigned_to_id=assigned_to,
+        created_by=actor,
+        priority=_choice(row, 'priority', Task.PRIORITY_CHOICES, 'medium'),
+        status=_choice(row, 'status', Task.STATUS_CHOICES, 'todo'),
+        due_date=due_date,
+        requires_approval=requires_approval in TRUE_VALUES,
+    )
+
+
+def import_tasks(stream, fmt, actor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import tasks from the text ``stream`` in format ``fmt`` and return an ``ImportResult``."""
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f'Unknown import format "{fmt}"')
+    result = ImportResult()
+    users = UsernameLookup()
+    records = read_rows(stream, fmt)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        users.load(_text(row, 'assigned_to') for _, row, error in chunk if error is None)
+        tasks = []
+        for line_number, row, error in chunk:
+            if error is None:
+                try:
+                    tasks.append(build_task(row, users, actor))
+                    continue
+                except ImportRowError as exc:
+                    error = str(exc)
+            result.errors.append((line_number, error))
+        result.created += len(bulk_create_tasks(tasks, actor))
+    return result
+
+
+def import_upload(uploaded_file, actor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """``import_tasks`` over a Django ``UploadedFile``, decoded line by line as it is read."""
+    stream = Utf8Lines(uploaded_file.file)
+    return import_tasks(stream, format_for(uploaded_file.name), actor=actor, chunk_size=chunk_size)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.archive import DEFAULT_BATCH_SIZE, archive_history, retention_cutoff
+from tasks.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        'Move TaskHistory entries older than the retention window into the compressed archive '
+        'and compact the task change feed to the same window.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Retention window in days (default: settings.TASK_HISTORY_RETENTION_DAYS).',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows moved per transaction.')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows are due.')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        before = retention_cutoff(options['days'])
+        result = archive_history(
+            before,
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{result.archived} history entries recorded before {before:%Y-%m-%d %H:%M} are due.')
+            return
+        pruned = prune_changes(before, batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {result.archived} history entries in {result.batches} batch(es); '
+            f'pruned {pruned} change feed rows.'
+        ))
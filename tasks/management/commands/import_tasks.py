@@ -0,0 +1,50 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.bulk import DEFAULT_CHUNK_SIZE
+from tasks.imports import IMPORT_COLUMNS, IMPORT_FORMATS, Utf8Lines, format_for, import_tasks
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create tasks from a CSV (with a header row) or JSON-lines file. '
+        f'Recognised columns: {", ".join(IMPORT_COLUMNS)}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for standard input.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Input format (default: from the file name).')
+        parser.add_argument('--actor', help='Username recorded as creator of the tasks and their history.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows validated and inserted per batch.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        actor = None
+        if options['actor']:
+            actor = User.objects.filter(username=options['actor']).first()
+            if actor is None:
+                raise CommandError(f'No user named "{options["actor"]}".')
+
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else format_for(path))
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+        try:
+            # Lines that are not valid UTF-8 are rejected like any other bad row
+            result = import_tasks(Utf8Lines(stream), fmt, actor=actor, chunk_size=options['chunk_size'])
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for line_number, message in result.errors:
+            self.stderr.write(f'line {line_number}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} task(s); {len(result.errors)} row(s) rejected.'
+        ))
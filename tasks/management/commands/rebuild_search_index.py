@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks.search import DOCUMENTS, get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for tasks and support tickets.'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        for model in DOCUMENTS:
+            with transaction.atomic():
+                count = backend.rebuild(model)
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} {model._meta.verbose_name_plural}.'))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.models import TaskCounter
+
+COUNT_FIELDS = ['assigned_count'] + list(TaskCounter.STATUS_FIELDS.values())
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user task counters from the task table, or verify them with --verify.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored counters with a fresh count; exit with an error on mismatch.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            expected = TaskCounter.compute_all()
+            stored = {
+                row['user_id']: row
+                for row in TaskCounter.objects.select_for_update().values('user_id', *COUNT_FIELDS)
+            }
+
+            mismatched = []
+            for user_id in set(expected) | set(stored):
+                want = {field: expected.get(user_id, {}).get(field, 0) for field in COUNT_FIELDS}
+                have = {field: stored.get(user_id, {}).get(field, 0) for field in COUNT_FIELDS}
+                if want != have:
+                    mismatched.append((user_id, have, want))
+
+            if options['verify']:
+                for user_id, have, want in mismatched:
+                    self.stdout.write(f'user {user_id}: stored {have}, expected {want}')
+                if mismatched:
+                    raise CommandError(f'{len(mismatched)} counter row(s) out of date.')
+                self.stdout.write(self.style.SUCCESS(f'All {len(stored)} counter rows are up to date.'))
+                return
+
+            TaskCounter.objects.all().delete()
+            TaskCounter.objects.bulk_create(
+                [TaskCounter(user_id=user_id, **dict(fields)) for user_id, fields in expected.items()],
+                batch_size=500,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt counters for {len(expected)} users ({len(mismatched)} were out of date).'
+        ))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.models import WeeklyTaskRollup
+
+COUNT_FIELDS = ['created_count', 'completed_count']
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weekly created/completed task rollup, or verify it with --verify.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored rollup rows with a fresh count; exit with an error on mismatch.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            expected = WeeklyTaskRollup.compute_all()
+            stored = {row['week']: row for row in WeeklyTaskRollup.objects.values('week', *COUNT_FIELDS)}
+
+            mismatched = []
+            for week in set(expected) | set(stored):
+                want = {field: expected.get(week, {}).get(field, 0) for field in COUNT_FIELDS}
+                have = {field: stored.get(week, {}).get(field, 0) for field in COUNT_FIELDS}
+                if want != have:
+                    mismatched.append((week, have, want))
+
+            if options['verify']:
+                for week, have, want in sorted(mismatched):
+                    self.stdout.write(f'week {week}: stored {have}, expected {want}')
+                if mismatched:
+                    raise CommandError(f'{len(mismatched)} rollup row(s) out of date.')
+                self.stdout.write(self.style.SUCCESS(f'All {len(stored)} rollup rows are up to date.'))
+                return
+
+            WeeklyTaskRollup.objects.all().delete()
+            WeeklyTaskRollup.objects.bulk_create(
+                [WeeklyTaskRollup(week=week, **dict(fields)) for week, fields in expected.items()],
+                batch_size=500,
+            )
+        WeeklyTaskRollup.clear_series_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(expected)} weekly rollup rows ({len(mismatched)} were out of date).'
+        ))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+STATUS_FIELDS = {
+    'todo': 'todo_count',
+    'in_progress': 'in_progress_count',
+    'completed': 'completed_count',
+    'blocked': 'blocked_count',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+    rows = (
+        Task.objects.filter(assigned_to__isnull=False)
+        .values_list('assigned_to', 'status')
+        .annotate(n=models.Count('id'))
+        .order_by()
+    )
+    counters = {}
+    for user_id, status, n in rows:
+        counter = counters.setdefault(user_id, TaskCounter(user_id=user_id))
+        counter.assigned_count += n
+        field = STATUS_FIELDS.get(status)
+        if field:
+            setattr(counter, field, getattr(counter, field) + n)
+    TaskCounter.objects.bulk_create(counters.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0003_supportreply'),
+        ('tasks', '0002_task_approved_task_requires_approval_taskhistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('assigned_count', models.IntegerField(default=0)),
+                ('todo_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('blocked_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3}
+
+
+def backfill_priority_rank(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.update(priority_rank=models.Case(
+        *[models.When(priority=priority, then=models.Value(rank)) for priority, rank in PRIORITY_RANKS.items()],
+        default=models.Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_assignee_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_due_priority_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'due_date', '-priority_rank', 'id'], name='task_assignee_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', '-priority_rank', 'id'], name='task_due_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:30
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def week_start(value):
+    day = timezone.localtime(value).date()
+    return day - timedelta(days=day.weekday())
+
+
+def backfill_completion_and_rollup(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    WeeklyTaskRollup = apps.get_model('tasks', 'WeeklyTaskRollup')
+    # The transition time was never stored; last update is the best estimate
+    Task.objects.filter(status='completed').update(completed_at=models.F('updated_at'))
+
+    created, completed = Counter(), Counter()
+    for created_at, completed_at in Task.objects.values_list('created_at', 'completed_at').iterator(chunk_size=2000):
+        created[week_start(created_at)] += 1
+        if completed_at:
+            completed[week_start(completed_at)] += 1
+    WeeklyTaskRollup.objects.bulk_create(
+        [
+            WeeklyTaskRollup(week=week, created_count=created[week], completed_count=completed[week])
+            for week in set(created) | set(completed)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_priority_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyTaskRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(unique=True)),
+                ('created_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['week'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_status_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_completion_and_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:40
+
+from django.db import migrations
+
+TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+
+def create_task_search(apps, schema_editor):
+    # The FTS5 index only exists on SQLite; other databases use their own search backend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"CREATE VIRTUAL TABLE task_search USING fts5(title, body, people, tokenize = '{TOKENIZER}')")
+    schema_editor.execute(
+        """
+        INSERT INTO task_search (rowid, title, body, people)
+        SELECT t.id, t.title, coalesce(t.description, ''), trim(coalesce(a.username, '') || ' ' || coalesce(c.username, ''))
+        FROM tasks_task t
+        LEFT JOIN scheduler_customuser a ON a.id = t.assigned_to_id
+        LEFT JOIN scheduler_customuser c ON c.id = t.created_by_id
+        """
+    )
+
+
+def drop_task_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS task_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_weekly_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_task_search, drop_task_search),
+    ]
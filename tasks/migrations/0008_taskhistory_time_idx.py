@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskhistory',
+            index=models.Index(fields=['timestamp'], name='taskhistory_time_idx'),
+        ),
+    ]
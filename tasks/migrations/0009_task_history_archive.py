@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_taskhistory_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskHistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('period', models.DateField()),
+                ('entry_count', models.PositiveIntegerField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_id', 'period'], name='historyarchive_task_idx')],
+            },
+        ),
+    ]
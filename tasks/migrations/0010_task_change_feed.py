@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    """One row per existing task, so a feed read from the start lists every task."""
+    Task = apps.get_model('tasks', 'Task')
+    TaskChange = apps.get_model('tasks', 'TaskChange')
+    rows = Task.objects.order_by('updated_at', 'id').values_list('id', 'assigned_to_id', 'updated_at')
+    TaskChange.objects.bulk_create(
+        (
+            TaskChange(task_id=task_id, assigned_to_id=assignee, changed_at=updated_at)
+            for task_id, assignee, updated_at in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_history_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('assigned_to_id', models.BigIntegerField(null=True)),
+                ('previous_assigned_to_id', models.BigIntegerField(null=True)),
+                ('changed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_id', 'id'], name='taskchange_task_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
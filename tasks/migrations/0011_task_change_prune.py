@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangePrune',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('before', models.DateTimeField()),
+                ('pruned_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
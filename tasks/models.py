@@ -1,9 +1,30 @@
-from django.db import models
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from scheduler.database import write_transaction
+
 User = get_user_model()
 
+
+class TaskQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Tasks ``user`` may see and edit: every task for supervisors and superusers, else those they hold or created."""
+        if not getattr(user, 'is_authenticated', False):
+            return self.none()
+        if user.is_superuser or getattr(user, 'role', None) == 'supervisor':
+            return self.all()
+        return self.filter(Q(assigned_to=user) | Q(created_by=user))
+
+
 class Task(models.Model):
     PRIORITY_CHOICES = [
         ('low', 'Low'),
@@ -11,6 +32,13 @@ class Task(models.Model):
         ('high', 'High'),
     ]
 
+    # Numeric rank for each priority so ordering by urgency can use an index
+    PRIORITY_RANKS = {
+        'low': 1,
+        'medium': 2,
+        'high': 3,
+    }
+
     STATUS_CHOICES = [
         ('todo', 'To Do'),
         ('in_progress', 'In Progress'),
@@ -18,6 +46,15 @@ class Task(models.Model):
         ('blocked', 'Blocked'),
     ]
 
+    # Status moves a task may make; see ``tasks.transitions``
+    TRANSITIONS = {
+        'todo': ('in_progress', 'blocked', 'completed'),
+        'in_progress': ('todo', 'blocked', 'completed'),
+        'blocked': ('todo', 'in_progress'),
+        # Reopening sends work back to in progress
+        'completed': ('in_progress',),
+    }
+
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     created_by = models.ForeignKey(
@@ -45,6 +82,7 @@ class Task(models.Model):
         choices=PRIORITY_CHOICES, 
         default='medium'
     )
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
     status = models.CharField(
         max_length=20, 
         choices=STATUS_CHOICES, 
@@ -53,79 +91,147 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateTimeField(null=True, blank=True)
+    # Set when the task moves to 'completed', cleared if it moves back
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
     # Approval workflow
     requires_approval = models.BooleanField(default=False)
     approved = models.BooleanField(default=False)
 
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    @property
+    def next_statuses(self):
+        """Statuses this task may move to now; completing waits for approval where it is required."""
+        return tuple(
+            status for status in self.TRANSITIONS.get(self.status, ())
+            if status != 'completed' or self.approved or not self.requires_approval
+        )
+
+    # Fields whose changes are recorded in TaskHistory / TaskCounter / WeeklyTaskRollup
+    TRACKED_FIELDS = ('status', 'assigned_to_id', 'approved', 'completed_at')
+    # Fields the search document is built from; saves that leave them alone skip re-indexing
+    SEARCH_FIELDS = ('title', 'description', 'assigned_to_id', 'created_by_id')
+    SNAPSHOT_FIELDS = tuple(dict.fromkeys(TRACKED_FIELDS + SEARCH_FIELDS))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot the loaded values so save() can diff without re-reading the row
+        instance._loaded_values = {
+            name: getattr(instance, name)
+            for name in cls.SNAPSHOT_FIELDS
+            if name in instance.__dict__
+        }
+        return instance
+
+    def _old_values(self):
+        """Tracked values as last loaded from the database.
+
+        Uses the ``from_db`` snapshot; only instances built by hand (or with
+        tracked fields deferred) fall back to reading the missing columns.
+        """
+        old = dict(getattr(self, '_loaded_values', {}))
+        missing = [name for name in self.TRACKED_FIELDS if name not in old]
+        if missing:
+            row = Task.objects.filter(pk=self.pk).values(*missing).first()
+            if row is None:
+                return None
+            old.update(row)
+        return old
+
+    def history_entries(self, old):
+        """Unsaved TaskHistory rows describing the change from ``old`` to now."""
+        actor = getattr(self, '_current_user', None)
+        if old is None:
+            return [TaskHistory(task=self, actor=actor, action='created', old_value='', new_value=self.title)]
+        entries = []
+        if old['status'] != self.status:
+            entries.append(TaskHistory(
+                task=self, actor=actor, action='status_changed',
+                old_value=old['status'], new_value=self.status,
+            ))
+        if old['assigned_to_id'] != self.assigned_to_id:
+            entries.append(TaskHistory(
+                task=self, actor=actor, action='assigned_changed',
+                old_value=str(old['assigned_to_id']), new_value=str(self.assigned_to_id),
+            ))
+        if old['approved'] != self.approved:
+            entries.append(TaskHistory(
+                task=self, actor=actor, action='approval_changed',
+                old_value=str(old['approved']), new_value=str(self.approved),
+            ))
+        return entries
+
     def save(self, *args, **kwargs):
         # Set created_by to the current user if not set
-        is_create = not self.pk
-        old = None
         if not self.pk and not self.created_by_id and hasattr(self, '_current_user'):
             self.created_by = self._current_user
 
-        # If updating, load the old instance to detect changes for history
-        if not is_create:
-            try:
-                old = Task.objects.get(pk=self.pk)
-            except Task.DoesNotExist:
-                old = None
-
-        super().save(*args, **kwargs)
-
-        # Create TaskHistory entries for important changes
-        # TaskHistory is defined later in this module; reference directly
-        try:
-            TaskHistory
-        except NameError:
-            TaskHistory = None
-
-        if TaskHistory:
-            # On create
-            if is_create:
-                TaskHistory.objects.create(
-                    task=self,
-                    actor=getattr(self, '_current_user', None),
-                    action='created',
-                    old_value='',
-                    new_value=self.title
-                )
-            else:
-                # Status change
-                if old and old.status != self.status:
-                    TaskHistory.objects.create(
-                        task=self,
-                        actor=getattr(self, '_current_user', None),
-                        action='status_changed',
-                        old_value=old.status,
-                        new_value=self.status
-                    )
-                # Assignment change
-                old_assignee = old.assigned_to_id if old else None
-                if old_assignee != (self.assigned_to_id if self.assigned_to_id else None):
-                    TaskHistory.objects.create(
-                        task=self,
-                        actor=getattr(self, '_current_user', None),
-                        action='assigned_changed',
-                        old_value=str(old_assignee),
-                        new_value=str(self.assigned_to_id)
-                    )
-                # Approval change
-                old_approved = getattr(old, 'approved', False)
-                if old_approved != self.approved:
-                    TaskHistory.objects.create(
-                        task=self,
-                        actor=getattr(self, '_current_user', None),
-                        action='approval_changed',
-                        old_value=str(old_approved),
-                        new_value=str(self.approved)
-                    )
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, 0)
+        old = self._old_values() if self.pk else None
+
+        if self.status != 'completed':
+            self.completed_at = None
+        elif old is None or old['status'] != 'completed':
+            self.completed_at = timezone.now()
+
+        with write_transaction():
+            super().save(*args, **kwargs)
+
+            # Record important changes with one batched insert
+            entries = self.history_entries(old)
+            if entries:
+                TaskHistory.objects.bulk_create(entries)
+
+            old_key = (old['assigned_to_id'], old['status']) if old else None
+            new_key = (self.assigned_to_id, self.status)
+            if old_key != new_key:
+                deltas = Counter({new_key: 1})
+                if old_key:
+                    deltas[old_key] -= 1
+                TaskCounter.apply_deltas(deltas)
+
+            rollup = Counter()
+            if old is None:
+                rollup[(week_start(self.created_at), 'created_count')] += 1
+            old_completed = old['completed_at'] if old else None
+            if old_completed != self.completed_at:
+                if old_completed:
+                    rollup[(week_start(old_completed), 'completed_count')] -= 1
+                if self.completed_at:
+                    rollup[(week_start(self.completed_at), 'completed_count')] += 1
+            WeeklyTaskRollup.apply_deltas(rollup)
+
+            TaskChange.record([(self.pk, self.assigned_to_id, old['assigned_to_id'] if old else None)])
+
+        self._loaded_values = {name: getattr(self, name) for name in self.SNAPSHOT_FIELDS}
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Task list: one assignee, optional status, ordered by due date
+            models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            models.Index(fields=['assigned_to', 'due_date', '-priority_rank', 'id'], name='task_assignee_due_idx'),
+            # Unfiltered list (superusers) in display order
+            models.Index(fields=['due_date', '-priority_rank', 'id'], name='task_due_priority_idx'),
+            # Overdue counts only ever look at tasks that are not completed
+            models.Index(
+                fields=['assigned_to', 'due_date'],
+                name='task_open_overdue_idx',
+                condition=~models.Q(status='completed'),
+            ),
+            # Weekly time series
+            models.Index(fields=['created_at'], name='task_created_idx'),
+        ]
+
+
+def week_start(value):
+    """Monday (local date) of the week containing the datetime ``value``."""
+    day = timezone.localtime(value).date()
+    return day - timedelta(days=day.weekday())
 
 
 class TaskHistory(models.Model):
@@ -144,5 +250,257 @@ class TaskHistory(models.Model):
     new_value = models.TextField(blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'timestamp'], name='taskhistory_task_time_idx'),
+            # Admin changelist: newest first and date drill-down
+            models.Index(fields=['timestamp'], name='taskhistory_time_idx'),
+        ]
+
     def __str__(self):
         return f"{self.task_id} - {self.action} @ {self.timestamp}"
+
+
+class TaskHistoryArchive(models.Model):
+    """History entries moved out of ``TaskHistory`` by ``archive_task_history``.
+
+    One row holds one task's entries for one calendar month as gzipped JSON
+    lines. ``task_id`` is a plain column rather than a foreign key so that
+    deleting a task never cascades through the archive; the ``post_delete``
+    receiver below removes the task's archive rows by index instead.
+    """
+    task_id = models.BigIntegerField()
+    # First day of the month the entries were recorded in
+    period = models.DateField()
+    entry_count = models.PositiveIntegerField()
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task_id', 'period'], name='historyarchive_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} - {self.period:%Y-%m} ({self.entry_count} entries)"
+
+
+class TaskChange(models.Model):
+    """Append-only log of task writes, read by the change feed.
+
+    Every save, bulk update and delete of a task appends a row. The
+    autoincrement id is the feed's position: SQLite serializes writers, so
+    rows commit in id order and a client that has read up to an id never
+    misses a later write. ``task_id`` is a plain column so delete tombstones
+    outlive the task; the assignees before and after the write decide who is
+    told about it.
+    """
+    task_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    assigned_to_id = models.BigIntegerField(null=True)
+    previous_assigned_to_id = models.BigIntegerField(null=True)
+    changed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Compaction: is there a later row for the same task?
+            models.Index(fields=['task_id', 'id'], name='taskchange_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} {'deleted' if self.deleted else 'changed'} @ {self.changed_at}"
+
+    @classmethod
+    def record(cls, changes, deleted=False):
+        """Append one row per ``(task_id, assigned_to_id, previous_assigned_to_id)`` in ``changes``."""
+        cls.objects.bulk_create([
+            cls(task_id=task_id, deleted=deleted, assigned_to_id=assignee, previous_assigned_to_id=previous)
+            for task_id, assignee, previous in changes
+        ])
+
+
+class TaskChangePrune(models.Model):
+    """One row per ``prune_changes`` run.
+
+    Cursors issued before the latest ``before`` may have missed pruned rows
+    and are expired, whatever retention window the run was given.
+    """
+    before = models.DateTimeField()
+    pruned_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"pruned before {self.before} @ {self.pruned_at}"
+
+
+class TaskCounter(models.Model):
+    """Denormalized per-user task counts.
+
+    Kept up to date by ``Task.save``, task deletion and the bulk task paths
+    so summaries read one row per user instead of counting the task table.
+    Overdue counts depend on the clock and are not stored here.
+    """
+    STATUS_FIELDS = {
+        'todo': 'todo_count',
+        'in_progress': 'in_progress_count',
+        'completed': 'completed_count',
+        'blocked': 'blocked_count',
+    }
+
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='task_counter')
+    assigned_count = models.IntegerField(default=0)
+    todo_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    blocked_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Counters for user {self.user_id}"
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """Apply ``{(user_id, status): delta}`` changes with one UPDATE per user.
+
+        Tasks without an assignee are ignored. Must run inside the same
+        transaction as the task write that produced the deltas.
+        """
+        per_user = defaultdict(Counter)
+        for (user_id, status), delta in deltas.items():
+            if user_id is None or not delta:
+                continue
+            per_user[user_id]['assigned_count'] += delta
+            field = cls.STATUS_FIELDS.get(status)
+            if field:
+                per_user[user_id][field] += delta
+        if not per_user:
+            return
+        # Only users gaining a task may lack a row: anyone whose task count is
+        # unchanged (a status change) already holds a task and so has one.
+        # Decrements never create a row, which also keeps cascading user
+        # deletes from resurrecting rows.
+        cls.objects.bulk_create(
+            [cls(user_id=user_id) for user_id, fields in per_user.items() if fields['assigned_count'] > 0],
+            ignore_conflicts=True,
+        )
+        now = timezone.now()
+        for user_id, fields in per_user.items():
+            changes = {name: F(name) + delta for name, delta in fields.items() if delta}
+            if changes:
+                cls.objects.filter(user_id=user_id).update(updated_at=now, **changes)
+
+    @classmethod
+    def compute_all(cls):
+        """Count tasks from scratch, returning ``{user_id: {field: count}}``."""
+        rows = (
+            Task.objects.filter(assigned_to__isnull=False)
+            .values_list('assigned_to', 'status')
+            .annotate(n=models.Count('id'))
+            .order_by()
+        )
+        totals = defaultdict(Counter)
+        for user_id, status, n in rows:
+            totals[user_id]['assigned_count'] += n
+            field = cls.STATUS_FIELDS.get(status)
+            if field:
+                totals[user_id][field] += n
+        return totals
+
+
+class WeeklyTaskRollup(models.Model):
+    """Tasks created and completed per week, maintained as tasks change.
+
+    ``tasks_time_series`` reads at most a dozen of these rows instead of
+    grouping the task table. The assembled series is cached in-process;
+    the cache is dropped whenever this process commits a rollup change and
+    otherwise expires after ``SERIES_CACHE_TTL`` seconds so changes made by
+    other workers show up promptly.
+    """
+    week = models.DateField(unique=True)
+    created_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    SERIES_CACHE_TTL = 60
+    _series_cache = {}
+    _series_lock = threading.Lock()
+
+    class Meta:
+        ordering = ['week']
+
+    def __str__(self):
+        return f"Week of {self.week}: {self.created_count} created, {self.completed_count} completed"
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """Apply ``{(week, field): delta}`` changes, one UPDATE per week."""
+        per_week = defaultdict(Counter)
+        for (week, field), delta in deltas.items():
+            if delta:
+                per_week[week][field] += delta
+        if not per_week:
+            return
+        # A week being decremented was counted before and already has its row
+        cls.objects.bulk_create(
+            [cls(week=week) for week, fields in per_week.items() if any(d > 0 for d in fields.values())],
+            ignore_conflicts=True,
+        )
+        for week, fields in per_week.items():
+            cls.objects.filter(week=week).update(**{name: F(name) + delta for name, delta in fields.items()})
+        transaction.on_commit(cls.clear_series_cache)
+
+    @classmethod
+    def clear_series_cache(cls):
+        with cls._series_lock:
+            cls._series_cache.clear()
+
+    @classmethod
+    def series(cls, weeks=12, now=None):
+        """``[{'week', 'created', 'completed'}, ...]`` from ``weeks`` ago up to this week."""
+        now = now or timezone.now()
+        first = week_start(now - timedelta(weeks=weeks))
+        last = week_start(now)
+        with cls._series_lock:
+            cached = cls._series_cache.get((first, last))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        rows = {
+            week: (created, completed)
+            for week, created, completed in cls.objects.filter(week__gte=first, week__lte=last)
+            .values_list('week', 'created_count', 'completed_count')
+        }
+        series = []
+        week = first
+        while week <= last:
+            created, completed = rows.get(week, (0, 0))
+            series.append({'week': week.isoformat(), 'created': created, 'completed': completed})
+            week += timedelta(weeks=1)
+
+        with cls._series_lock:
+            cls._series_cache[(first, last)] = (time.monotonic() + cls.SERIES_CACHE_TTL, series)
+        return series
+
+    @classmethod
+    def compute_all(cls):
+        """Recount every week from the task table: ``{week: {field: count}}``."""
+        totals = defaultdict(Counter)
+        for created_at, completed_at in Task.objects.values_list('created_at', 'completed_at').iterator(chunk_size=2000):
+            totals[week_start(created_at)]['created_count'] += 1
+            if completed_at:
+                totals[week_start(completed_at)]['completed_count'] += 1
+        return totals
+
+
+@receiver(post_delete, sender=Task)
+def decrement_task_counters(sender, instance, **kwargs):
+    """Keep ``TaskCounter``, ``WeeklyTaskRollup``, the history archive and the change feed in step when tasks are deleted (including cascades)."""
+    TaskCounter.apply_deltas({(instance.assigned_to_id, instance.status): -1})
+    rollup = Counter({(week_start(instance.created_at), 'created_count'): -1})
+    if instance.completed_at:
+        rollup[(week_start(instance.completed_at), 'completed_count')] -= 1
+    WeeklyTaskRollup.apply_deltas(rollup)
+    # Archived history has no foreign key to cascade through
+    TaskHistoryArchive.objects.filter(task_id=instance.pk).delete()
+    # Tombstone for the change feed
+    TaskChange.record([(instance.pk, None, instance.assigned_to_id)], deleted=True)
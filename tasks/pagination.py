@@ -0,0 +1,178 @@
+"""Keyset (cursor) pagination.
+
+Instead of ``OFFSET n`` each page filters on the sort key of the last row
+seen, so a page costs the same whether it is the first or the ten
+thousandth. Cursors are opaque url-safe tokens holding the direction and the
+boundary row's sort key.
+
+NULLs are treated as the smallest value in every column, which matches
+SQLite's native ordering and is applied explicitly for other backends.
+"""
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str = None
+    previous_cursor: str = None
+    approximate_total: int = None
+    total_is_capped: bool = False
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def approximate_count(queryset, cap):
+    """Count ``queryset`` but stop after ``cap`` rows; returns ``(count, capped)``."""
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count > cap
+
+
+class CappedCountPaginator(Paginator):
+    """``Paginator`` whose count stops at ``count_cap`` rows.
+
+    For admin changelists over tables too large for ``COUNT(*)``: counting
+    costs at most ``count_cap`` index entries, and since no page beyond the
+    cap is offered, no ``OFFSET`` can exceed it either.
+    """
+    count_cap = 10000
+
+    @cached_property
+    def count(self):
+        count, _ = approximate_count(self.object_list, self.count_cap)
+        return count
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` on ``ordering``, a sequence of ``(field, descending)``.
+
+    The last field must be unique and non-null (normally ``'id'``) so the
+    ordering is total.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count_cap=None):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.count_cap = count_cap
+        self.model_fields = {name: queryset.model._meta.get_field(name) for name, _ in self.ordering}
+
+    def order_by(self, queryset, reverse=False):
+        """Apply the paginator's ordering (or its exact reverse) to ``queryset``."""
+        terms = []
+        for name, descending in self.ordering:
+            if descending != reverse:
+                terms.append(F(name).desc(nulls_last=True))
+            else:
+                terms.append(F(name).asc(nulls_first=True))
+        return queryset.order_by(*terms)
+
+    def _after(self, values, reverse, index=0):
+        """Q matching rows strictly after ``values`` in the (possibly reversed) ordering."""
+        name, descending = self.ordering[index]
+        descending = descending != reverse
+        value = values[index]
+        last = index == len(self.ordering) - 1
+        rest = None if last else self._after(values, reverse, index + 1)
+
+        if value is None:
+            tie = Q(**{f'{name}__isnull': True})
+            if descending:
+                # NULLs come last, so only other NULLs can follow
+                return tie & rest if rest is not None else Q(pk__in=[])
+            after = Q(**{f'{name}__isnull': False})
+            return (tie & rest) | after if rest is not None else after
+        beyond = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+        if descending:
+            beyond |= Q(**{f'{name}__isnull': True})
+        if rest is None:
+            return beyond
+        return beyond | (Q(**{name: value}) & rest)
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            # Rows from .values(); the ordering fields must be among the selected keys
+            return [obj[name] for name, _ in self.ordering]
+        return [getattr(obj, self.model_fields[name].attname) for name, _ in self.ordering]
+
+    @staticmethod
+    def _serialize(value):
+        # Full precision: DjangoJSONEncoder drops microseconds, which would
+        # make a cursor land before rows that tie on the truncated value
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, direction, obj):
+        payload = json.dumps(
+            {'d': direction, 'k': [self._serialize(v) for v in self._key(obj)]},
+            cls=DjangoJSONEncoder,
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw = payload['d'], payload['k']
+            if direction not in ('n', 'p') or len(raw) != len(self.ordering):
+                raise InvalidCursor(cursor)
+            values = [
+                None if value is None else self.model_fields[name].to_python(value)
+                for (name, _), value in zip(self.ordering, raw)
+            ]
+        except (ValueError, KeyError, TypeError, binascii.Error, ValidationError):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def page(self, cursor=None):
+        """Return the ``KeysetPage`` starting after (or ending before) ``cursor``."""
+        direction, values = self.decode_cursor(cursor) if cursor else ('n', None)
+        reverse = direction == 'p'
+        queryset = self.order_by(self.queryset, reverse=reverse)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        page = KeysetPage(rows)
+        if rows:
+            # Arriving backwards means there is always a page after this one
+            if has_more or reverse:
+                page.next_cursor = self.encode_cursor('n', rows[-1])
+            if (has_more and reverse) or (values is not None and not reverse):
+                page.previous_cursor = self.encode_cursor('p', rows[0])
+        if self.count_cap:
+            page.approximate_total, page.total_is_capped = approximate_count(self.queryset, self.count_cap)
+        return page
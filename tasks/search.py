@@ -0,0 +1,371 @@
+"""Full-text search over tasks and support tickets.
+
+Every searchable model has a ``Document``: the FTS table it lives in and a
+function that turns a row into three text columns (``title``, ``body`` and
+``people``). The backend named by ``settings.SEARCH_BACKEND`` keeps its index
+in step through the signal receivers below and turns a user query into a
+ranked filter on an ordinary queryset. Saves that leave a document's
+``SEARCH_FIELDS`` unchanged are not re-indexed, and a new ticket reply is
+appended to its ticket's document rather than rebuilding the thread. Renaming
+or deleting a user re-indexes the documents that name them. Callers apply
+their own visibility rules first, so search never widens what a user can
+see, and only rows that match the query are read.
+
+``SQLiteFTSBackend`` stores the index in FTS5 tables created by the
+``search_index`` migrations. A Postgres backend would subclass
+``SearchBackend`` and implement the same six methods over a ``tsvector``
+column. ``LikeSearchBackend`` is the portable fallback.
+"""
+import operator
+import re
+from dataclasses import dataclass
+from functools import reduce
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from scheduler.models import CustomUser, SupportReply, SupportTicket
+from .models import Task
+
+# Longer queries are cut to this many terms
+MAX_QUERY_TERMS = 8
+
+
+@dataclass(frozen=True)
+class Document:
+    table: str
+    build: object
+    # Columns matched by LikeSearchBackend
+    like_fields: tuple
+    # bm25 weights for title, body and people
+    weights: tuple = (10.0, 1.0, 5.0)
+
+
+def _people(instance, *fields):
+    """Usernames of the users ``instance`` points to through the foreign keys ``fields``.
+
+    Relations already loaded (``select_related`` when indexing in bulk) are
+    used as they are; the rest are read by id in one query.
+    """
+    user_ids, names = [], {}
+    for name in fields:
+        field = instance._meta.get_field(name)
+        user_id = getattr(instance, field.attname)
+        if user_id is None:
+            continue
+        user_ids.append(user_id)
+        if field.is_cached(instance):
+            names[user_id] = getattr(instance, name).username
+    missing = [user_id for user_id in user_ids if user_id not in names]
+    if missing:
+        names.update(CustomUser.objects.filter(pk__in=missing).values_list('pk', 'username'))
+    return ' '.join(names[user_id] for user_id in user_ids if user_id in names)
+
+
+# Foreign keys to the users named in each model's ``people`` column
+PEOPLE_FIELDS = {
+    Task: ('assigned_to', 'created_by'),
+    SupportTicket: ('created_by', 'assigned_to'),
+}
+
+
+def task_document(task):
+    return {
+        'title': task.title,
+        'body': task.description or '',
+        'people': _people(task, *PEOPLE_FIELDS[Task]),
+    }
+
+
+def ticket_document(ticket):
+    # Replies are part of the ticket's text so a thread can be found by what was said in it
+    replies = [reply.message for reply in ticket.replies.all()]
+    return {
+        'title': ticket.subject,
+        'body': '\n'.join([ticket.description] + replies),
+        'people': _people(ticket, *PEOPLE_FIELDS[SupportTicket]),
+    }
+
+
+def document_changed(instance):
+    """Whether a save may have changed ``instance``'s document, judged by its load-time snapshot."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return True
+    return any(name not in loaded or loaded[name] != getattr(instance, name) for name in instance.SEARCH_FIELDS)
+
+
+DOCUMENTS = {
+    Task: Document('task_search', task_document, ('title', 'description')),
+    SupportTicket: Document('ticket_search', ticket_document, ('subject', 'description')),
+}
+
+# Relations each document reads, loaded up front when indexing in bulk
+PREFETCH = {
+    Task: {'select_related': ('assigned_to', 'created_by'), 'prefetch_related': ()},
+    SupportTicket: {'select_related': ('created_by', 'assigned_to'), 'prefetch_related': ('replies',)},
+}
+
+
+def query_terms(query):
+    """Split free text into at most ``MAX_QUERY_TERMS`` word terms."""
+    return re.findall(r'\w+', query or '')[:MAX_QUERY_TERMS]
+
+
+class SearchBackend:
+    """Interface every search backend implements."""
+
+    def index(self, instance):
+        """Add or refresh the document for ``instance``."""
+        raise NotImplementedError
+
+    def remove(self, model, pk):
+        """Drop the document for ``model`` row ``pk``."""
+        raise NotImplementedError
+
+    def rebuild(self, model):
+        """Re-index every row of ``model``; returns the number indexed."""
+        raise NotImplementedError
+
+    def append(self, model, pk, text):
+        """Add ``text`` to the body of the document for ``model`` row ``pk``."""
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """Narrow ``queryset`` to rows matching ``query``, keeping its ordering."""
+        raise NotImplementedError
+
+    def search(self, queryset, query):
+        """Narrow ``queryset`` to rows matching ``query``, best match first.
+
+        Rows are annotated with ``search_rank``; lower ranks are better.
+        """
+        raise NotImplementedError
+
+    def index_queryset(self, queryset):
+        """Refresh the documents for every row of ``queryset``."""
+        count = 0
+        for instance in self._with_related(queryset).iterator(chunk_size=500):
+            self.index(instance)
+            count += 1
+        return count
+
+    @staticmethod
+    def _with_related(queryset):
+        options = PREFETCH[queryset.model]
+        return queryset.select_related(*options['select_related']).prefetch_related(*options['prefetch_related'])
+
+
+class LikeSearchBackend(SearchBackend):
+    """Unindexed fallback: every term must appear in one of the document's fields.
+
+    Costs a full scan per query; use it only where no full-text index is
+    available.
+    """
+
+    def index(self, instance):
+        pass
+
+    def remove(self, model, pk):
+        pass
+
+    def rebuild(self, model):
+        return 0
+
+    def index_queryset(self, queryset):
+        return 0
+
+    def append(self, model, pk, text):
+        pass
+
+    def filter(self, queryset, query):
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        fields = DOCUMENTS[queryset.model].like_fields
+        for term in terms:
+            queryset = queryset.filter(reduce(operator.or_, (Q(**{f'{f}__icontains': term}) for f in fields)))
+        return queryset
+
+    def search(self, queryset, query):
+        return self.filter(queryset, query).annotate(search_rank=Value(0.0))
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """FTS5 index with bm25 ranking.
+
+    The document's rowid is the model's primary key, so a match is joined
+    back to the model table without a lookup column.
+    """
+
+    def index(self, instance):
+        document = DOCUMENTS[type(instance)]
+        columns = document.build(instance)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {document.table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f'INSERT INTO {document.table} (rowid, title, body, people) VALUES (%s, %s, %s, %s)',
+                [instance.pk, columns['title'], columns['body'], columns['people']],
+            )
+
+    def index_queryset(self, queryset):
+        # Two executemany() calls per chunk instead of two statements per row
+        document = DOCUMENTS[queryset.model]
+        count = 0
+        rows = self._with_related(queryset).order_by().iterator(chunk_size=500)
+        while True:
+            chunk = list(islice(rows, 500))
+            if not chunk:
+                return count
+            columns = [(instance.pk, document.build(instance)) for instance in chunk]
+            with connection.cursor() as cursor:
+                cursor.executemany(f'DELETE FROM {document.table} WHERE rowid = %s', [[pk] for pk, _ in columns])
+                cursor.executemany(
+                    f'INSERT INTO {document.table} (rowid, title, body, people) VALUES (%s, %s, %s, %s)',
+                    [[pk, doc['title'], doc['body'], doc['people']] for pk, doc in columns],
+                )
+            count += len(chunk)
+
+    def remove(self, model, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {DOCUMENTS[model].table} WHERE rowid = %s', [pk])
+
+    def append(self, model, pk, text):
+        table = DOCUMENTS[model].table
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {table} SET body = body || char(10) || %s WHERE rowid = %s", [text, pk])
+
+    def rebuild(self, model):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {DOCUMENTS[model].table}')
+        return self.index_queryset(model._default_manager.all())
+
+    @staticmethod
+    def match_expression(query):
+        """FTS5 query requiring every term, each as a prefix; user syntax is never passed through."""
+        return ' '.join(f'"{term}"*' for term in query_terms(query))
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        table = DOCUMENTS[queryset.model].table
+        # Evaluated once into a temporary b-tree, then probed per candidate row
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match]))
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        document = DOCUMENTS[queryset.model]
+        table = document.table
+        outer = f'"{queryset.model._meta.db_table}"."{queryset.model._meta.pk.column}"'
+        weights = ', '.join(str(weight) for weight in document.weights)
+        return self.filter(queryset, query).annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25({table}, {weights}) FROM {table} WHERE {table} MATCH %s AND rowid = {outer}',
+                [match],
+            ),
+        ).order_by('search_rank', 'pk')
+
+
+_backend = None
+
+
+def get_backend():
+    """The configured backend; FTS5 on SQLite and the LIKE fallback elsewhere by default."""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = LikeSearchBackend()
+    return _backend
+
+
+def search(queryset, query):
+    """``queryset`` narrowed to matches of ``query`` and ordered by relevance."""
+    return get_backend().search(queryset, query)
+
+
+def search_filter(queryset, query):
+    """``queryset`` narrowed to matches of ``query``, in its own order."""
+    return get_backend().filter(queryset, query)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=SupportTicket)
+def index_document(sender, instance, created=False, raw=False, **kwargs):
+    # Status, approval and other saves that leave the document alone cost nothing here
+    if not raw and (created or document_changed(instance)):
+        get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SupportTicket)
+def remove_document(sender, instance, **kwargs):
+    get_backend().remove(sender, instance.pk)
+
+
+def reindex_ticket(ticket_id):
+    ticket = SupportTicket.objects.filter(pk=ticket_id).select_related('created_by', 'assigned_to').first()
+    if ticket is not None:
+        get_backend().index(ticket)
+
+
+@receiver(post_save, sender=SupportReply)
+@receiver(post_delete, sender=SupportReply)
+def reindex_reply_ticket(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # A new reply only adds text; no need to reload the thread
+        get_backend().append(SupportTicket, instance.ticket_id, instance.message)
+    else:
+        # Edits and deletes rebuild the thread once the transaction commits;
+        # a ticket deleted with its replies is gone by then and is skipped
+        ticket_id = instance.ticket_id
+        transaction.on_commit(lambda: reindex_ticket(ticket_id))
+
+
+def naming(model, user_id, fields=None):
+    """Rows of ``model`` whose document names user ``user_id`` through ``fields`` (default: all of them)."""
+    fields = fields or PEOPLE_FIELDS[model]
+    return model._default_manager.filter(reduce(operator.or_, (Q(**{name: user_id}) for name in fields)))
+
+
+@receiver(post_save, sender=CustomUser)
+def reindex_renamed_user(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created or not document_changed(instance):
+        return
+    backend = get_backend()
+    for model in PEOPLE_FIELDS:
+        backend.index_queryset(naming(model, instance.pk))
+
+
+# Deleting a user cascades to what they created, which post_delete above
+# removes, but clears their assignments with a bulk UPDATE that sends no
+# post_save. Those documents are noted before the delete and re-indexed after.
+@receiver(pre_delete, sender=CustomUser)
+def note_assigned_documents(sender, instance, **kwargs):
+    instance._assigned_documents = {
+        model: list(naming(model, instance.pk, ('assigned_to',)).values_list('pk', flat=True))
+        for model in PEOPLE_FIELDS
+    }
+
+
+@receiver(post_delete, sender=CustomUser)
+def reindex_assigned_documents(sender, instance, **kwargs):
+    backend = get_backend()
+    for model, pks in getattr(instance, '_assigned_documents', {}).items():
+        if pks:
+            backend.index_queryset(model._default_manager.filter(pk__in=pks))
@@ -1,3 +1,576 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from scheduler.models import SupportReply, SupportTicket
+
+from .archive import timeline
+from .bulk import bulk_reassign
+from .forms import TaskForm
+from .changes import ChangeCursor, prune_changes
+from .imports import import_tasks, import_upload
+from .models import Task, TaskChange, TaskCounter, TaskHistory, TaskHistoryArchive, WeeklyTaskRollup
+from .pagination import KeysetPaginator
+from .search import search
+
+User = get_user_model()
+
+
+class TaskCounterTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', role='intern')
+        self.bob = User.objects.create_user('bob', role='intern')
+
+    def counters(self, user):
+        counter = TaskCounter.objects.filter(user=user).first()
+        if counter is None:
+            return (0, 0, 0)
+        return (counter.assigned_count, counter.in_progress_count, counter.completed_count)
+
+    def test_save_and_delete_keep_counters_in_step(self):
+        task = Task.objects.create(title='a', assigned_to=self.alice)
+        Task.objects.create(title='b', assigned_to=self.alice, status='in_progress')
+        self.assertEqual(self.counters(self.alice), (2, 1, 0))
+
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(self.counters(self.alice), (2, 1, 1))
+
+        task.assigned_to = self.bob
+        task.save()
+        self.assertEqual(self.counters(self.alice), (1, 1, 0))
+        self.assertEqual(self.counters(self.bob), (1, 0, 1))
+
+        Task.objects.filter(assigned_to=self.alice).delete()
+        self.assertEqual(self.counters(self.alice), (0, 0, 0))
+        call_command('rebuild_task_counters', verify=True, stdout=StringIO())
+
+    def test_rebuild_repairs_drift(self):
+        Task.objects.create(title='a', assigned_to=self.alice)
+        TaskCounter.objects.filter(user=self.alice).update(assigned_count=5)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_counters', verify=True, stdout=StringIO())
+        call_command('rebuild_task_counters', stdout=StringIO())
+        self.assertEqual(self.counters(self.alice), (1, 0, 0))
+
+
+class TaskHistoryTrackingTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', role='intern')
+        self.bob = User.objects.create_user('bob', role='intern')
+        self.task = Task.objects.create(title='a', assigned_to=self.alice)
+
+    def test_update_does_not_reselect_and_batches_history(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = 'completed'
+        task.assigned_to = self.bob
+        task.approved = True
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        sql = [q['sql'] for q in ctx.captured_queries]
+        self.assertFalse([s for s in sql if s.startswith('SELECT') and '"tasks_task"' in s])
+        self.assertEqual(len([s for s in sql if s.startswith('INSERT INTO "tasks_taskhistory"')]), 1)
+        self.assertEqual(
+            set(TaskHistory.objects.filter(task=task).values_list('action', flat=True)),
+            {'created', 'status_changed', 'assigned_changed', 'approval_changed'},
+        )
+
+    def test_repeated_saves_diff_against_last_save(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = 'in_progress'
+        task.save()
+        task.save()
+        self.assertEqual(TaskHistory.objects.filter(task=task, action='status_changed').count(), 1)
+
+
+class BulkReassignTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', role='intern')
+        self.bob = User.objects.create_user('bob', role='intern')
+        self.boss = User.objects.create_user('boss', role='supervisor')
+        self.tasks = [Task.objects.create(title=f't{i}', assigned_to=self.alice) for i in range(7)]
+
+    def test_reassigns_in_chunks_with_history_and_counters(self):
+        ids = [t.id for t in self.tasks]
+        with CaptureQueriesContext(connection) as ctx:
+            changed = bulk_reassign(ids, self.bob, actor=self.boss, chunk_size=5)
+        self.assertEqual(changed, 7)
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(Task.objects.filter(assigned_to=self.bob, delegated_by=self.boss).count(), 7)
+        self.assertEqual(TaskHistory.objects.filter(action='assigned_changed', actor=self.boss).count(), 7)
+        call_command('rebuild_task_counters', verify=True, stdout=StringIO())
+
+        self.assertEqual(bulk_reassign(ids, self.bob, actor=self.boss), 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('root', role='supervisor')
+        now = timezone.now()
+        for i in range(23):
+            Task.objects.create(
+                title=f't{i}',
+                assigned_to=self.user,
+                priority=['low', 'medium', 'high'][i % 3],
+                # a few undated tasks and plenty of ties on the due date
+                due_date=None if i % 7 == 0 else now + timedelta(days=i % 4),
+            )
+        self.ordering = (('due_date', False), ('priority_rank', True), ('id', False))
+
+    def test_forward_and_backward_walks_cover_the_ordering(self):
+        paginator = KeysetPaginator(Task.objects.all(), self.ordering, per_page=5)
+        expected = list(paginator.order_by(Task.objects.all()).values_list('id', flat=True))
+
+        pages, page = [], paginator.page()
+        while True:
+            pages.append([t.id for t in page])
+            if not page.has_next:
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(sum(pages, []), expected)
+
+        backwards = [[t.id for t in page]]
+        while page.has_previous:
+            page = paginator.page(page.previous_cursor)
+            backwards.insert(0, [t.id for t in page])
+        self.assertEqual(backwards, pages)
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        self.client.force_login(self.user)
+        url = reverse('tasks:task_list')
+        counts, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            counts.append(len(ctx.captured_queries))
+            page = response.context['cursor_page']
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(set(counts)), 1)
+        self.assertEqual(self.client.get(url, {'cursor': 'bogus'}).status_code, 404)
+
+    def test_priority_sorts_by_urgency_not_alphabetically(self):
+        Task.objects.all().delete()
+        due = timezone.now()
+        for priority in ('medium', 'low', 'high'):
+            Task.objects.create(title=priority, assigned_to=self.user, priority=priority, due_date=due)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:task_list'))
+        self.assertEqual([t.title for t in response.context['tasks']], ['high', 'medium', 'low'])
+
+
+class WeeklyRollupTests(TestCase):
+    def setUp(self):
+        WeeklyTaskRollup.clear_series_cache()
+        self.alice = User.objects.create_user('alice', role='intern')
+
+    def this_week(self):
+        # on_commit never fires inside TestCase, so drop the cache by hand
+        WeeklyTaskRollup.clear_series_cache()
+        return WeeklyTaskRollup.series(weeks=12)[-1]
+
+    def test_completion_is_recorded_once_and_survives_edits(self):
+        task = Task.objects.create(title='a', assigned_to=self.alice)
+        self.assertEqual(self.this_week()['created'], 1)
+        self.assertIsNone(task.completed_at)
+
+        task.status = 'completed'
+        task.save()
+        completed_at = task.completed_at
+        self.assertIsNotNone(completed_at)
+        self.assertEqual(self.this_week()['completed'], 1)
+
+        task.title = 'renamed'
+        task.save()
+        self.assertEqual(Task.objects.get(pk=task.pk).completed_at, completed_at)
+        self.assertEqual(self.this_week()['completed'], 1)
+
+        task.status = 'in_progress'
+        task.save()
+        self.assertIsNone(task.completed_at)
+        self.assertEqual(self.this_week()['completed'], 0)
+
+        task.delete()
+        self.assertEqual(self.this_week()['created'], 0)
+        call_command('rebuild_task_rollup', verify=True, stdout=StringIO())
+
+    def test_series_is_cached_until_a_rollup_changes(self):
+        self.assertEqual(len(WeeklyTaskRollup.series(weeks=12)), 13)
+        with self.assertNumQueries(0):
+            WeeklyTaskRollup.series(weeks=12)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='a', assigned_to=self.alice)
+        with self.assertNumQueries(1):
+            self.assertEqual(WeeklyTaskRollup.series(weeks=12)[-1]['created'], 1)
+
+
+class TaskApiTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw', role='intern')
+        self.bob = User.objects.create_user('bob', role='intern')
+        for i in range(7):
+            Task.objects.create(title=f'a{i}', assigned_to=self.alice, priority='high')
+        Task.objects.create(title='b0', assigned_to=self.bob)
+        self.client.login(username='alice', password='pw')
+        self.url = reverse('tasks:task_api')
+
+    def test_sparse_fields_and_cursor_walk_stay_in_scope(self):
+        response = self.client.get(self.url, {'fields': 'id,title', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(set(body['results'][0]), {'id', 'title'})
+        second = self.client.get(self.url, {'fields': 'id,title', 'limit': 5, 'cursor': body['next']}).json()
+        titles = [row['title'] for row in body['results'] + second['results']]
+        self.assertEqual(sorted(titles), [f'a{i}' for i in range(7)])
+        self.assertIsNone(second['next'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_unchanged_poll_returns_304_without_serializing(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        with self.assertNumQueries(3):  # session, user, validator aggregate
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        task = Task.objects.filter(assigned_to=self.alice).first()
+        task.status = 'in_progress'
+        task.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TaskChangeFeedTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw', role='intern')
+        self.bob = User.objects.create_user('bob', role='intern')
+        self.tasks = [Task.objects.create(title=f'a{i}', assigned_to=self.alice) for i in range(3)]
+        Task.objects.create(title='b0', assigned_to=self.bob)
+        self.client.login(username='alice', password='pw')
+        self.url = reverse('tasks:task_changes_api')
+
+    def feed(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_feed_pages_through_changes_then_reports_edits_and_removals(self):
+        first = self.feed(limit=2, fields='id,title')
+        self.assertTrue(first['has_more'])
+        rest = self.feed(limit=2, fields='id,title', cursor=first['next'])
+        self.assertEqual(sorted(row['title'] for row in first['tasks'] + rest['tasks']), ['a0', 'a1', 'a2'])
+        self.assertEqual(set(first['tasks'][0]), {'id', 'title'})
+        cursor = self.feed(cursor=rest['next'])['next']
+        self.assertEqual(self.feed(cursor=cursor)['tasks'], [])
+
+        edited, moved, gone = self.tasks
+        edited.title = 'renamed'
+        edited.save()
+        edited.status = 'in_progress'
+        edited.save()
+        bulk_reassign([moved.pk], self.bob)
+        gone_id = gone.pk
+        gone.delete()
+
+        with self.assertNumQueries(6):  # session, user, prune watermark, change log, history, scoped tasks
+            body = self.feed(cursor=cursor, fields='id,title')
+        self.assertEqual(body['tasks'], [{'id': edited.pk, 'title': 'renamed'}])
+        self.assertEqual(body['removed'], [{'id': moved.pk, 'deleted': False}, {'id': gone_id, 'deleted': True}])
+        self.assertEqual([entry['action'] for entry in body['history']], ['status_changed'])
+        self.assertFalse(body['has_more'])
+
+    def test_latest_skips_backlog_and_bad_or_expired_cursors_are_rejected(self):
+        latest = self.feed(cursor='latest')
+        self.assertEqual(self.feed(cursor=latest['next'])['tasks'], [])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nope'}).status_code, 400)
+
+        with self.settings(TASK_HISTORY_RETENTION_DAYS=0):
+            self.assertEqual(self.client.get(self.url, {'cursor': latest['next']}).status_code, 410)
+
+    def test_pruning_with_a_shorter_window_expires_older_cursors(self):
+        month_old = ChangeCursor(issued_at=timezone.now() - timedelta(days=30)).encode()
+        self.feed(cursor=month_old)
+        self.tasks[0].delete()
+        TaskChange.objects.update(changed_at=timezone.now() - timedelta(days=10))
+
+        call_command('archive_task_history', days=7, stdout=StringIO())
+        # The tombstone is gone, so the cursor can no longer be read past
+        self.assertFalse(TaskChange.objects.filter(deleted=True).exists())
+        self.assertEqual(self.client.get(self.url, {'cursor': month_old}).status_code, 410)
+
+    def test_pruning_keeps_the_latest_row_per_live_task(self):
+        task = self.tasks[0]
+        task.status = 'completed'
+        task.save()
+        self.tasks[1].delete()
+        TaskChange.objects.update(changed_at=timezone.now() - timedelta(days=400))
+
+        self.assertEqual(prune_changes(timezone.now() - timedelta(days=180), batch_size=1), 3)
+        self.assertEqual(TaskChange.objects.filter(task_id=task.pk).count(), 1)
+        self.assertFalse(TaskChange.objects.filter(task_id=self.tasks[1].pk).exists())
+        self.assertEqual(len(self.feed()['tasks']), 2)
+
+
+class TaskTransitionTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw', role='intern')
+        self.bob = User.objects.create_user('bob', password='pw', role='intern')
+        self.boss = User.objects.create_user('boss', password='pw', role='supervisor')
+        self.task = Task.objects.create(title='t', assigned_to=self.alice, created_by=self.boss)
+        self.client.login(username='alice', password='pw')
+
+    def move(self, status, source=None, task=None):
+        url = reverse('tasks:update_task_status', args=[(task or self.task).pk, status])
+        return self.client.get(url, {'from': source} if source else {})
+
+    def test_transition_is_one_conditional_update_with_its_bookkeeping(self):
+        # Session, user, savepoint, history insert, task update, counter,
+        # two rollup statements, change feed row, release
+        with CaptureQueriesContext(connection) as queries, self.assertNumQueries(10):
+            self.assertEqual(self.move('completed', source='todo').status_code, 302)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE tasks_task ')]), 1)
+        self.assertFalse([q for q in queries if 'FROM "tasks_task"' in q['sql']])
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+        self.assertIsNotNone(self.task.completed_at)
+        counter = TaskCounter.objects.get(user=self.alice)
+        self.assertEqual((counter.todo_count, counter.completed_count), (0, 1))
+        self.assertEqual(sum(row.completed_count for row in WeeklyTaskRollup.objects.all()), 1)
+        entry = TaskHistory.objects.filter(task=self.task).latest('id')
+        self.assertEqual((entry.action, entry.old_value, entry.new_value, entry.actor), ('status_changed', 'todo', 'completed', self.alice))
+
+        # Reopening without a source reads only the old completion time
+        with self.assertNumQueries(10):
+            self.move('in_progress')
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.completed_at), ('in_progress', None))
+        self.assertEqual(sum(row.completed_count for row in WeeklyTaskRollup.objects.all()), 0)
+        self.assertEqual(TaskHistory.objects.filter(task=self.task).latest('id').old_value, 'completed')
+
+        with self.assertNumQueries(8):  # no rollup change
+            self.move('blocked')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'blocked')
+        counter = TaskCounter.objects.get(user=self.alice)
+        self.assertEqual((counter.assigned_count, counter.blocked_count, counter.in_progress_count), (1, 1, 0))
+
+    def test_refused_transitions_leave_the_task_alone(self):
+        self.move('todo', source='todo')
+        self.move('completed', source='in_progress')
+        self.move('cancelled')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'todo')
+        self.assertEqual(TaskHistory.objects.filter(task=self.task, action='status_changed').count(), 0)
+
+        self.task.requires_approval = True
+        self.task.save()
+        self.assertEqual(self.task.next_statuses, ('in_progress', 'blocked'))
+        response = self.move('completed', source='todo')
+        self.assertIn('approved', str(list(get_messages(response.wsgi_request))[-1]))
+        self.task.approved = True
+        self.task.save()
+        self.move('completed', source='todo')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+
+    def test_visible_to_scopes_views(self):
+        other = Task.objects.create(title='o', assigned_to=self.bob)
+        self.assertEqual(list(Task.objects.visible_to(self.alice)), [self.task])
+        self.assertEqual(Task.objects.visible_to(self.boss).count(), 2)
+        self.assertEqual(self.move('completed', source='todo', task=other).status_code, 404)
+        self.assertEqual(self.client.get(reverse('tasks:task_update', args=[other.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('tasks:task_history_api', args=[other.pk])).status_code, 404)
+        form = TaskForm({'title': 't', 'priority': 'medium', 'status': 'blocked'}, instance=self.task)
+        self.assertTrue(form.is_valid())
+        self.task.status = 'completed'
+        form = TaskForm({'title': 't', 'priority': 'medium', 'status': 'todo'}, instance=self.task)
+        self.assertIn('status', form.errors)
+
+        # Supervisors see every task but only move their own
+        self.client.login(username='boss', password='pw')
+        self.move('in_progress', source='todo', task=other)
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'todo')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw', role='intern')
+        self.bob = User.objects.create_user('bob', role='intern')
+        self.report = Task.objects.create(title='Quarterly report', description='numbers', assigned_to=self.alice)
+        self.mention = Task.objects.create(title='Slides', description='summarise the report', assigned_to=self.alice)
+        self.other = Task.objects.create(title='Report for bob', assigned_to=self.bob)
+
+    def test_index_follows_saves_and_deletes_and_ranks_titles_first(self):
+        self.assertEqual(list(search(Task.objects.all(), 'report')), [self.report, self.other, self.mention])
+        self.report.title = 'Quarterly budget'
+        self.report.save()
+        self.assertEqual(list(search(Task.objects.all(), 'budget')), [self.report])
+        self.report.delete()
+        self.assertFalse(search(Task.objects.all(), 'budget').exists())
+
+    def test_prefix_terms_and_hostile_syntax(self):
+        self.assertEqual(list(search(Task.objects.all(), 'summ rep')), [self.mention])
+        self.assertFalse(search(Task.objects.all(), '"').exists())
+        self.assertEqual(search(Task.objects.all(), 'report" OR NEAR(').count(), 0)
+
+    def test_task_list_search_keeps_the_users_scope(self):
+        self.client.login(username='alice', password='pw')
+        response = self.client.get(reverse('tasks:task_list'), {'q': 'report'})
+        self.assertEqual(list(response.context['tasks']), [self.report, self.mention])
+
+    def test_renaming_or_deleting_a_user_updates_the_documents_naming_them(self):
+        boss = User.objects.create_user('boss', role='supervisor')
+        ticket = SupportTicket.objects.create(subject='VPN', description='...', created_by=self.bob, assigned_to=boss)
+        self.report.assigned_to = boss
+        self.report.save()
+        boss.username = 'chief'
+        boss.save()
+        self.assertFalse(search(Task.objects.all(), 'boss').exists())
+        self.assertEqual(list(search(Task.objects.all(), 'chief')), [self.report])
+        self.assertEqual(list(search(SupportTicket.objects.all(), 'chief')), [ticket])
+
+        # Unassigning by SET_NULL sends no post_save for the task or ticket
+        boss.delete()
+        self.assertFalse(search(Task.objects.all(), 'chief').exists())
+        self.assertFalse(search(SupportTicket.objects.all(), 'chief').exists())
+
+        with self.assertNumQueries(1):
+            self.alice.first_name = 'Alice'
+            self.alice.save()
+
+    def test_bulk_reassign_and_ticket_replies_are_indexed(self):
+        bulk_reassign([self.other.pk], self.alice)
+        self.assertEqual(list(search(Task.objects.all(), 'alice bob')), [self.other])
+
+        ticket = SupportTicket.objects.create(subject='Laptop', description='broken', created_by=self.alice)
+        SupportReply.objects.create(ticket=ticket, responder=self.bob, message='replacement ordered')
+        self.assertEqual(list(search(SupportTicket.objects.all(), 'replacement')), [ticket])
+        with CaptureQueriesContext(connection) as ctx:
+            reply = SupportReply.objects.create(ticket=ticket, responder=self.bob, message='courier booked')
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "scheduler_supportreply"' in q['sql']])
+        self.assertEqual(list(search(SupportTicket.objects.all(), 'replacement courier')), [ticket])
+        with self.captureOnCommitCallbacks(execute=True):
+            reply.delete()
+        self.assertFalse(search(SupportTicket.objects.all(), 'courier').exists())
+
+    def test_only_saves_that_change_the_document_reindex(self):
+        task = Task.objects.get(pk=self.report.pk)
+        task.status = 'completed'
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'task_search' in q['sql'] or 'scheduler_customuser' in q['sql']])
+
+        task.title = 'Annual report'
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        # Usernames are read by id in one query
+        self.assertEqual(len([q for q in ctx.captured_queries if 'scheduler_customuser' in q['sql']]), 1)
+        self.assertEqual(list(search(Task.objects.all(), 'annual alice')), [task])
+
+
+class HistoryArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw', role='intern')
+        self.task = Task.objects.create(title='t', assigned_to=self.user)
+        self.task.status = 'in_progress'
+        self.task.save()
+        self.task.status = 'completed'
+        self.task.save()
+        # Age the first two entries past the retention window
+        old = timezone.now() - timedelta(days=400)
+        first_two = list(TaskHistory.objects.filter(task=self.task).order_by('id').values_list('id', flat=True)[:2])
+        TaskHistory.objects.filter(id__in=first_two).update(timestamp=old)
+
+    def test_old_entries_move_to_the_archive_and_timeline_merges_them(self):
+        before = [(h.id, h.action, h.new_value) for h in TaskHistory.objects.filter(task=self.task).order_by('timestamp', 'id')]
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('archive_task_history', days=180, batch_size=1, stdout=StringIO())
+        # One DELETE per batch; the collector never loads the rows it deletes
+        history = [q['sql'] for q in ctx.captured_queries if 'FROM "tasks_taskhistory"' in q['sql']]
+        self.assertEqual(len([sql for sql in history if sql.startswith('DELETE')]), 2)
+        self.assertFalse([sql for sql in history if '"tasks_taskhistory"."id" IN' in sql and sql.startswith('SELECT')])
+
+        self.assertEqual(TaskHistory.objects.filter(task=self.task).count(), 1)
+        self.assertEqual(TaskHistoryArchive.objects.filter(task_id=self.task.pk).count(), 2)
+        merged = timeline(self.task.pk)
+        self.assertEqual([(h.id, h.action, h.new_value) for h in merged], before)
+        self.assertEqual([h.archived for h in merged], [True, True, False])
+
+        self.client.login(username='alice', password='pw')
+        body = self.client.get(reverse('tasks:task_history_api', args=[self.task.pk])).json()
+        self.assertEqual([entry['id'] for entry in body['results']], [entry[0] for entry in before])
+
+    def test_deleting_a_task_removes_its_archive(self):
+        call_command('archive_task_history', stdout=StringIO())
+        self.task.delete()
+        self.assertFalse(TaskHistoryArchive.objects.exists())
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.boss = User.objects.create_user('boss', password='pw', role='supervisor')
+        self.alice = User.objects.create_user('alice', role='intern')
+
+    def test_csv_import_creates_tasks_and_reports_bad_rows(self):
+        source = StringIO(
+            'title,assigned_to,priority,status,due_date\n'
+            'Read handbook,alice,high,todo,2030-01-15\n'
+            ',alice,low,todo,\n'
+            'Set up laptop,nobody,low,todo,\n'
+            'Sign forms,alice,urgent,todo,\n'
+            'Meet the team,alice,medium,completed,2030-01-16T09:30\n'
+        )
+        with self.assertNumQueries(13):  # one batch, independent of its size
+            result = import_tasks(source, 'csv', actor=self.boss, chunk_size=500)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5])
+        self.assertIn('unknown or inactive user "nobody"', result.errors[1][1])
+
+        counter = TaskCounter.objects.get(user=self.alice)
+        self.assertEqual((counter.assigned_count, counter.completed_count), (2, 1))
+        self.assertEqual(TaskHistory.objects.filter(action='created', actor=self.boss).count(), 2)
+        self.assertEqual(list(search(Task.objects.all(), 'handbook').values_list('title', flat=True)), ['Read handbook'])
+        self.assertIsNotNone(Task.objects.get(title='Meet the team').completed_at)
+        call_command('rebuild_task_rollup', verify=True, stdout=StringIO())
+
+    def test_upload_endpoint_accepts_jsonl(self):
+        self.client.login(username='boss', password='pw')
+        upload = SimpleUploadedFile(
+            'cohort.jsonl',
+            b'{"title": "One", "assigned_to": "alice"}\nnot json\n{"title": "Two"}\n',
+        )
+        response = self.client.post(reverse('import_tasks'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 2)
+        self.assertEqual(response.context['errors'][0][0], 2)
+
+    def test_bad_utf8_rejects_its_row_only(self):
+        body = b'title,assigned_to\n' + b''.join(b'Task %d,alice\n' % i for i in range(3)) + b'Caf\xe9,alice\nLast,alice\n'
+        result = import_upload(SimpleUploadedFile('cohort.csv', body), actor=self.boss, chunk_size=2)
+        self.assertEqual(result.created, 4)
+        self.assertEqual(result.errors, [(5, 'not valid UTF-8')])
 
-# Create your tests here.
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as fh:
+            fh.write(b'{"title": "One"}\n{"title": "\xff"}\n{"title": "Two"}\n')
+            fh.flush()
+            err = StringIO()
+            call_command('import_tasks', fh.name, chunk_size=1, stdout=StringIO(), stderr=err)
+        self.assertEqual(err.getvalue().strip(), 'line 2: not valid UTF-8')
+        self.assertTrue(Task.objects.filter(title='Two').exists())
@@ -0,0 +1,140 @@
+"""Status changes through the declared ``Task.TRANSITIONS`` state machine.
+
+``transition`` moves one task with two statements and no task or user
+objects: a conditional history insert,
+``INSERT ... SELECT ... WHERE id = ? AND status IN (...) AND (assigned_to = ? OR created_by = ?)``,
+which checks the move and returns the status being left, then the
+``UPDATE ... RETURNING`` of the columns the bookkeeping needs. SQLite's
+``RETURNING`` only sees the new row, which is why the old status comes
+from the insert. Like the bulk operations it bypasses ``Task.save`` and
+writes the counter and rollup deltas and change feed row itself,
+invalidates the dashboard cache and announces the change to live update
+subscribers. Only when the insert matches nothing is the row read again,
+to tell the caller why.
+"""
+from collections import Counter
+
+from django.db import connection
+from django.utils import timezone
+
+from scheduler.caching import TEAM, bump_on_change, user_scope
+from scheduler.database import write_transaction
+from scheduler.events import task_status_changed
+
+from .models import Task, TaskChange, TaskCounter, TaskHistory, WeeklyTaskRollup, week_start
+
+STATUS_LABELS = dict(Task.STATUS_CHOICES)
+
+
+class TransitionError(Exception):
+    """A refused status change; ``str()`` is fit to show the user."""
+
+
+class InvalidTransition(TransitionError):
+    pass
+
+
+class TransitionDenied(TransitionError):
+    pass
+
+
+class ApprovalRequired(TransitionError):
+    pass
+
+
+class StaleTransition(TransitionError):
+    """The task's status changed since the caller read it."""
+
+
+def allowed(source, target):
+    return target in Task.TRANSITIONS.get(source, ())
+
+
+def _invalid(source, target):
+    return InvalidTransition(f'A task cannot move from {STATUS_LABELS.get(source, source)} to {STATUS_LABELS[target]}.')
+
+
+def _history_sql(target, sources):
+    """Conditional history insert; returns the status the task is leaving, or no row."""
+    sql = (
+        f'INSERT INTO {TaskHistory._meta.db_table} (task_id, actor_id, action, old_value, new_value, timestamp) '
+        f"SELECT id, %s, 'status_changed', status, %s, %s FROM {Task._meta.db_table} "
+        f'WHERE id = %s AND status IN ({", ".join(["%s"] * len(sources))}) '
+        'AND (assigned_to_id = %s OR created_by_id = %s)'
+    )
+    if target == 'completed':
+        sql += ' AND (NOT requires_approval OR approved)'
+    return sql + ' RETURNING old_value'
+
+
+UPDATE_SQL = (
+    f'UPDATE {Task._meta.db_table} SET status = %s, updated_at = %s, completed_at = %s '
+    'WHERE id = %s AND status = %s RETURNING assigned_to_id, created_by_id, title'
+)
+
+
+def _refusal(task_id, source, target, user):
+    """Why the conditional insert matched no row."""
+    row = (
+        Task.objects.visible_to(user).filter(pk=task_id)
+        .values('status', 'assigned_to_id', 'created_by_id').first()
+    )
+    if row is None:
+        return Task.DoesNotExist()
+    if user.pk not in (row['assigned_to_id'], row['created_by_id']):
+        return TransitionDenied("You don't have permission to update this task.")
+    if source is not None and row['status'] != source:
+        return StaleTransition(f'The task is already {STATUS_LABELS.get(row["status"], row["status"])}.')
+    if not allowed(row['status'], target):
+        return _invalid(row['status'], target)
+    return ApprovalRequired('This task has to be approved before it can be completed.')
+
+
+def transition(task_id, target, user, source=None):
+    """Move task ``task_id`` to ``target`` on behalf of ``user``; returns the status it left.
+
+    ``source`` is the status the caller last saw, if known; the move is
+    refused as stale when the task has moved on since. Raises
+    ``Task.DoesNotExist`` for tasks ``user`` cannot see and a
+    ``TransitionError`` when the move is refused.
+    """
+    if target not in STATUS_LABELS:
+        raise InvalidTransition(f'Unknown status "{target}".')
+    if source is not None and not allowed(source, target):
+        raise _invalid(source, target)
+    sources = [source] if source is not None else [name for name in Task.TRANSITIONS if allowed(name, target)]
+
+    now = timezone.now()
+    completed_at = now if target == 'completed' else None
+    stamp = connection.ops.adapt_datetimefield_value(now)
+    with write_transaction():
+        with connection.cursor() as cursor:
+            # The history row records the old status, so the move is checked
+            # and the status it leaves learned in a single statement
+            cursor.execute(_history_sql(target, sources), [
+                user.pk, target, stamp, task_id, *sources, user.pk, user.pk,
+            ])
+            row = cursor.fetchone()
+            if row is None:
+                raise _refusal(task_id, source, target, user)
+            source = row[0]
+            old_completed_at = None
+            if source == 'completed':
+                # Reopening needs the old completion week to correct the rollup
+                old_completed_at = Task.objects.filter(pk=task_id).values_list('completed_at', flat=True).get()
+            cursor.execute(UPDATE_SQL, [
+                target, stamp, connection.ops.adapt_datetimefield_value(completed_at), task_id, source,
+            ])
+            assigned_to_id, created_by_id, title = cursor.fetchone()
+
+        TaskCounter.apply_deltas(Counter({(assigned_to_id, source): -1, (assigned_to_id, target): 1}))
+        rollup = Counter()
+        if old_completed_at:
+            rollup[(week_start(old_completed_at), 'completed_count')] -= 1
+        if completed_at:
+            rollup[(week_start(completed_at), 'completed_count')] += 1
+        WeeklyTaskRollup.apply_deltas(rollup)
+        TaskChange.record([(task_id, assigned_to_id, assigned_to_id)])
+        bump_on_change(TEAM, user_scope(assigned_to_id) if assigned_to_id else None)
+        task_status_changed(task_id, title, target, assigned_to_id, created_by_id)
+    return source
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'tasks'
 
@@ -9,4 +9,7 @@ urlpatterns = [
     path('<int:pk>/update/', views.TaskUpdateView.as_view(), name='task_update'),
     path('<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
     path('<int:pk>/status/<str:status>/', views.update_task_status, name='update_task_status'),
+    path('api/', api.task_list_json, name='task_api'),
+    path('api/changes/', api.task_changes_json, name='task_changes_api'),
+    path('api/<int:pk>/history/', api.task_history_json, name='task_history_api'),
 ]
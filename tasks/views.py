@@ -1,59 +1,107 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.utils import timezone
+from django.http import Http404
 
 from .models import Task
 from .forms import TaskForm
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search
+from .transitions import TransitionError, transition
+
+
+def list_scope(request):
+    """Tasks ``request.user`` may list, with the list's query-string filters applied.
+
+    Shared by ``TaskListView`` and the JSON API so both apply the same rules.
+    """
+    visible = Task.objects.visible_to(request.user)
+    # Allow supervisors/superusers to filter by a specific assigned user via GET param
+    assigned_user = request.GET.get('assigned_to')
+    role = getattr(request.user, 'role', None)
+
+    queryset = None
+    if assigned_user and (request.user.is_superuser or role == 'supervisor'):
+        try:
+            assigned_id = int(assigned_user)
+            queryset = visible.filter(assigned_to__id=assigned_id)
+        except (ValueError, TypeError):
+            queryset = Task.objects.none()
+
+    # If no explicit assigned filter, decide default scope
+    if queryset is None:
+        # If the user requested only their assigned tasks
+        if 'assigned_to_me' in request.GET:
+            queryset = Task.objects.filter(assigned_to=request.user)
+        else:
+            # Superusers see all tasks by default, supervisors and interns see their assigned tasks
+            if request.user.is_superuser:
+                queryset = visible
+            else:
+                queryset = Task.objects.filter(assigned_to=request.user)
+
+    # Filter by status if provided
+    status = request.GET.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
 
 class TaskListView(LoginRequiredMixin, ListView):
     model = Task
     template_name = 'tasks/task_list.html'
     context_object_name = 'tasks'
     paginate_by = 10
-    
-    
+    # Sort key for cursor pagination: due date, then most urgent, then id
+    keyset_ordering = (('due_date', False), ('priority_rank', True), ('id', False))
+    # Stop counting after this many rows; the template shows "N+"
+    count_cap = 1000
+    # Best matches shown for a ?q= search, which replaces paging
+    search_limit = 50
+
+    def search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def use_offset_pagination(self):
+        # Legacy ?page=N links keep working; everything else uses cursors
+        return 'page' in self.request.GET and not self.search_query()
+
+    def get_paginate_by(self, queryset):
+        return self.paginate_by if self.use_offset_pagination() else None
+
 
     def get_queryset(self):
-        # Allow supervisors/superusers to filter by a specific assigned user via GET param
-        assigned_user = self.request.GET.get('assigned_to')
-        role = getattr(self.request.user, 'role', None)
-        
+        queryset = list_scope(self.request)
 
-        queryset = None
-        if assigned_user and (self.request.user.is_superuser or role == 'supervisor'):
-            try:
-                assigned_id = int(assigned_user)
-                queryset = Task.objects.filter(assigned_to__id=assigned_id)
-            except (ValueError, TypeError):
-                queryset = Task.objects.none()
-
-        # If no explicit assigned filter, decide default scope
-        if queryset is None:
-            # If the user requested only their assigned tasks
-            if 'assigned_to_me' in self.request.GET:
-                queryset = Task.objects.filter(assigned_to=self.request.user)
-            else:
-                # Superusers see all tasks by default, supervisors and interns see their assigned tasks
-                if self.request.user.is_superuser:
-                    queryset = Task.objects.all()
-                else:
-                    queryset = Task.objects.filter(assigned_to=self.request.user)
+        # Fetch the users shown on each card in the same query
+        queryset = queryset.select_related('assigned_to', 'delegated_by')
 
-        # Filter by status if provided
-        status = self.request.GET.get('status')
-        if status:
-            queryset = queryset.filter(status=status)
+        # A search is ranked by relevance within the same scope
+        if self.search_query():
+            return search(queryset, self.search_query())[:self.search_limit]
 
         # Order by due date then priority
-        queryset = queryset.order_by('due_date', '-priority')
+        return KeysetPaginator(queryset, self.keyset_ordering, self.paginate_by).order_by(queryset)
 
-        return queryset
-    
     def get_context_data(self, **kwargs):
+        if self.search_query():
+            kwargs['search_query'] = self.search_query()
+        elif not self.use_offset_pagination():
+            paginator = KeysetPaginator(
+                self.object_list, self.keyset_ordering, self.paginate_by, count_cap=self.count_cap
+            )
+            try:
+                cursor_page = paginator.page(self.request.GET.get('cursor'))
+            except InvalidCursor:
+                raise Http404('Invalid cursor.')
+            kwargs['object_list'] = cursor_page.object_list
+            kwargs['cursor_page'] = cursor_page
+            query = self.request.GET.copy()
+            query.pop('cursor', None)
+            kwargs['filter_query'] = query.urlencode()
         context = super().get_context_data(**kwargs)
         context['status_choices'] = Task.STATUS_CHOICES
         return context
@@ -86,15 +134,15 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
         kwargs['user'] = self.request.user
         return kwargs
     
+    def get_queryset(self):
+        return Task.objects.visible_to(self.request.user)
+
     def form_valid(self, form):
-        old_assigned_to = self.get_object().assigned_to
-        response = super().form_valid(form)
-        
-        # Check if assigned_to has changed
-        if old_assigned_to != form.instance.assigned_to and form.instance.assigned_to:
+        # Compare with the assignee as loaded rather than fetching the task again
+        old_assigned_to_id = form.instance._loaded_values.get('assigned_to_id')
+        if form.instance.assigned_to_id and form.instance.assigned_to_id != old_assigned_to_id:
             form.instance.delegated_by = self.request.user
-            form.instance.save()
-            
+        response = super().form_valid(form)
         messages.success(self.request, 'Task updated successfully!')
         return response
 
@@ -102,7 +150,10 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
     model = Task
     template_name = 'tasks/task_confirm_delete.html'
     success_url = reverse_lazy('tasks:task_list')
-    
+
+    def get_queryset(self):
+        return Task.objects.visible_to(self.request.user)
+
     def delete(self, request, *args, **kwargs):
         response = super().delete(request, *args, **kwargs)
         messages.success(self.request, 'Task deleted successfully!')
@@ -110,17 +161,14 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
 
 @login_required
 def update_task_status(request, pk, status):
-    task = get_object_or_404(Task, pk=pk)
-    
-    # Verify user has permission to update this task
-    if task.assigned_to != request.user and task.created_by != request.user:
-        messages.error(request, "You don't have permission to update this task.")
+    # ``from`` is the status the page showed; a stale page gets a message instead of a blind overwrite
+    try:
+        transition(pk, status, request.user, source=request.GET.get('from'))
+    except Task.DoesNotExist:
+        raise Http404('No such task.')
+    except TransitionError as exc:
+        messages.error(request, str(exc))
         return redirect('tasks:task_list')
-    
-    # Update status
-    task.status = status
-    task.updated_at = timezone.now()
-    task.save()
-    
-    messages.success(request, f'Task marked as {dict(Task.STATUS_CHOICES).get(status, status)}')
+
+    messages.success(request, f'Task marked as {dict(Task.STATUS_CHOICES)[status]}')
     return redirect('tasks:task_list')